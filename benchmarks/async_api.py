@@ -0,0 +1,107 @@
+"""Concurrent /api/films/ throughput under uvicorn, sync vs async handlers.
+
+The sync variant is the pre-async handler: a `def` endpoint calling the
+sync manager, so every request holds a threadpool slot for its queries.
+
+    python -m benchmarks.async_api --duration 10 --clients 1 16 64
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Query
+
+from benchmarks.common import database_sessions, request, server_process
+from onlyfilms import manager
+from onlyfilms.app import create_app as onlyfilms_app
+from onlyfilms.models import response_models
+from onlyfilms.models.orm import Film, Review, User
+
+
+def sync_main_handler(
+    offset: int = Query(0, ge=0), limit: int = Query(10, le=50)
+) -> Any:
+    films, total = manager.get_film_rows('', offset, limit)
+    return {
+        'films': [response_models.film_row(film) for film in films],
+        'total': total.value,
+        'offset': offset,
+    }
+
+
+def throughput(
+    url: str,
+    clients: int,
+    duration: float,
+    headers: Optional[Dict[str, str]] = None,
+) -> float:
+    finish = time.perf_counter() + duration
+    counts: List[int] = []
+
+    def client() -> None:
+        done = 0
+        while time.perf_counter() < finish:
+            request(url, headers=headers)
+            done += 1
+        counts.append(done)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+def create_app() -> FastAPI:
+    app = onlyfilms_app()
+    app.get('/sync/films/', response_model=response_models.Films)(
+        sync_main_handler
+    )
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 16, 64])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        with database_sessions(path) as session_creator:
+            with session_creator() as session:
+                films = [Film(f'film #{x}') for x in range(1000)]
+                users = [
+                    User(f'user {x}', password_hash=b'') for x in range(50)
+                ]
+                session.add_all(films + users)
+                session.add_all(
+                    Review(user, film, 'review', x % 10)
+                    for x, (user, film) in enumerate(zip(users * 20, films))
+                )
+                session.commit()
+
+        with server_process(path, 'benchmarks.async_api:create_app') as base:
+            for clients in args.clients:
+                results = {
+                    name: throughput(
+                        f'{base}{route}?limit=50', clients, args.duration
+                    )
+                    for name, route in (
+                        ('sync', '/sync/films/'),
+                        ('async', '/api/films/'),
+                    )
+                }
+                print(
+                    f'{clients:>4} clients: '
+                    f'sync {results["sync"]:8.1f} req/s, '
+                    f'async {results["async"]:8.1f} req/s'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Time resolving an auth token with each token backend.
+
+Compares a database lookup of the token row (token cache cleared before
+every call), a token cache hit and the verification of a signed token.
+
+    python -m benchmarks.auth_tokens --repeat 20000
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.common import temporary_database
+from onlyfilms import auth, manager
+from onlyfilms.models.orm import User
+from onlyfilms.signed_tokens import signer
+
+
+async def measure(
+    resolve: Callable[[], Awaitable[object]], repeat: int
+) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        assert await resolve() is not None
+    return (time.perf_counter() - started) / repeat
+
+
+async def measure_all(token: str, signed: str, repeat: int) -> Dict[str, float]:
+    def database() -> Awaitable[object]:
+        auth.forget_token(token)
+        return auth.resolve_token_async(token)
+
+    return {
+        'database': await measure(database, repeat),
+        'cached': await measure(
+            lambda: auth.resolve_token_async(token), repeat
+        ),
+        'signed': await measure(
+            lambda: auth.resolve_token_async(signed), repeat
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10000)
+    args = parser.parse_args()
+
+    with temporary_database() as session_creator:
+        with session_creator() as session:
+            user = User('bench_user', password_hash=b'')
+            session.add(user)
+            session.commit()
+            token = manager.create_token(user, session=session)
+            signed = signer.issue(user.id, user.login)
+
+        timings = asyncio.run(measure_all(token, signed, args.repeat))
+        for name, timing in timings.items():
+            print(f'{name:>8}: {timing * 1e6:8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Time `onlyfilms import` on a synthetic JSONL catalog.
+
+Imports the catalog twice into a temporary database: the second run
+updates every film by external id. Peak RSS includes SQLite mmap pages,
+run with ONLYFILMS_SQLITE_MMAP_SIZE=0 to see that the importer itself stays
+flat as --rows grows.
+
+    python -m benchmarks.catalog_import --rows 1000000 --batch-size 1000
+"""
+import argparse
+import json
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import temporary_database
+from benchmarks.search import words
+from onlyfilms import importer
+
+
+def write_catalog(path: Path, rows: int) -> None:
+    rng = random.Random(rows)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(rows):
+            film = {
+                'external_id': f'tt{i:08d}',
+                'title': words(rng, 3),
+                'director': words(rng, 2),
+                'description': words(rng, 20),
+            }
+            file.write(json.dumps(film) + '\n')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'catalog.jsonl'
+        write_catalog(path, args.rows)
+
+        with temporary_database():
+            for run in ('insert', 'upsert'):
+                started = time.perf_counter()
+                result = importer.import_films(path, args.batch_size)
+                elapsed = time.perf_counter() - started
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                print(
+                    f'{run}: {args.rows} rows in {elapsed:8.2f} s '
+                    f'({args.rows / elapsed:9.0f} rows/s), '
+                    f'new {result.inserted}, updated {result.updated}, '
+                    f'peak rss {peak / 1024:.0f} MiB'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Iterator, List, Optional
+from unittest import mock
+
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from onlyfilms import Base
+from onlyfilms.database import create_async_db_engine, create_db_engine
+from onlyfilms.settings import Settings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(
+    url: str,
+    body: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> int:
+    data = None if body is None else json.dumps(body).encode('utf-8')
+    message = urllib.request.Request(
+        url,
+        data,
+        headers={'Content-Type': 'application/json', **(headers or {})},
+    )
+    try:
+        with urllib.request.urlopen(message, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+# points the sync and async managers at the SQLite file
+@contextlib.contextmanager
+def database_sessions(path: str) -> Iterator[sessionmaker]:
+    settings = Settings(database_url='sqlite:///' + path)
+    engine = create_db_engine(settings)
+    async_engine = create_async_db_engine(settings)
+    Base.metadata.create_all(engine)
+    session_creator = sessionmaker(engine, expire_on_commit=False)
+    async_session_creator = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    with mock.patch(
+        'onlyfilms.manager.base.SessionCreator', session_creator
+    ), mock.patch(
+        'onlyfilms.async_manager.AsyncSessionCreator',
+        async_session_creator,
+    ):
+        yield session_creator
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+@contextlib.contextmanager
+def temporary_database() -> Iterator[sessionmaker]:
+    with tempfile.TemporaryDirectory() as directory:
+        with database_sessions(os.path.join(directory, 'bench.db')) as sessions:
+            yield sessions
+
+
+@contextlib.contextmanager
+def running_server(app: FastAPI) -> Iterator[str]:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+# runs `python -m benchmarks.serve` so clients don't share the server GIL
+@contextlib.contextmanager
+def server_process(path: str, factory: str) -> Iterator[str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.serve', path, str(port), factory]
+    )
+    try:
+        while True:
+            with contextlib.suppress(OSError):
+                socket.create_connection(('127.0.0.1', port)).close()
+                break
+            if process.poll() is not None:
+                raise RuntimeError('Benchmark server failed to start')
+            time.sleep(0.1)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,167 @@
+"""Seeded synthetic dataset for the benchmarks.
+
+Films get Zipf-like words in their titles and descriptions. Review counts
+per film follow a Zipf distribution, so a few films carry most of the
+reviews, as on a real catalog. Reviewers are drawn uniformly. Every user
+has the password PASSWORD, and half of the tokens are expired. The same
+seed always builds the same database.
+
+    python -m benchmarks.dataset bench.db --films 100000 --users 10000 \
+        --reviews 1000000 --tokens 20000
+"""
+import argparse
+import datetime
+import itertools
+import random
+import uuid
+from typing import Dict, Iterable, Iterator, List, NamedTuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from benchmarks.search import words
+from onlyfilms import Base, manager
+from onlyfilms.database import create_db_engine
+from onlyfilms.hashing import hash_password
+from onlyfilms.models.orm import Film, Review, Token, User
+from onlyfilms.settings import Settings
+
+PASSWORD = 'bench_password'
+BATCH = 10000
+STARTED = datetime.datetime(2022, 1, 1)
+
+
+class Size(NamedTuple):
+    films: int = 1000
+    users: int = 200
+    reviews: int = 10000
+    tokens: int = 1000
+
+
+def login(user: int) -> str:
+    return f'user_{user}'
+
+
+# film ids from the most to the least reviewed
+def zipf_films(rng: random.Random, films: int, exponent: float = 1.0):
+    weights = itertools.accumulate(
+        1 / (x + 1) ** exponent for x in range(films)
+    )
+    cumulative = list(weights)
+    ids = range(1, films + 1)
+    while True:
+        yield from rng.choices(ids, cum_weights=cumulative, k=BATCH)
+
+
+def batches(rows: Iterable[Dict], size: int = BATCH) -> Iterator[List[Dict]]:
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def film_rows(rng: random.Random, size: Size) -> Iterator[Dict]:
+    for film_id in range(1, size.films + 1):
+        yield {
+            'id': film_id,
+            'title': f'{words(rng, 3)} {film_id}',
+            'director': words(rng, 2),
+            'description': words(rng, 20),
+            'external_id': f'bench{film_id}',
+            'score_sum': 0,
+            'score_count': 0,
+            'review_count': 0,
+        }
+
+
+def user_rows(size: Size) -> Iterator[Dict]:
+    password = hash_password(PASSWORD, rounds=4)
+    for user_id in range(1, size.users + 1):
+        yield {
+            'id': user_id,
+            'login': login(user_id),
+            'password': password,
+            'register_date': STARTED.date(),
+        }
+
+
+# a user reviews a film once, so popular films fill up and draws are retried
+def review_rows(rng: random.Random, size: Size) -> Iterator[Dict]:
+    seen = set()
+    films = zipf_films(rng, size.films)
+    target = min(size.reviews, size.films * size.users)
+    attempts = 0
+    while len(seen) < target and attempts < target * 5:
+        attempts += 1
+        pair = (rng.randint(1, size.users), next(films))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        yield {
+            'author_id': pair[0],
+            'film_id': pair[1],
+            'created': STARTED + datetime.timedelta(seconds=len(seen)),
+            'text': words(rng, 12),
+            'score': rng.choice([None, *range(1, 11)]),
+        }
+
+
+def token_rows(rng: random.Random, size: Size) -> Iterator[Dict]:
+    now = datetime.datetime.now()
+    for _ in range(size.tokens):
+        age = rng.random() * 2 * Token.EXPIRE.total_seconds()
+        yield {
+            'user_id': rng.randint(1, size.users),
+            'created': now - datetime.timedelta(seconds=age),
+            'token': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        }
+
+
+def insert_rows(connection: Connection, table, rows: Iterable[Dict]) -> None:
+    for batch in batches(rows):
+        connection.execute(insert(table), batch)
+
+
+def seed(engine: Engine, size: Size, seed_value: int = 0) -> None:
+    rng = random.Random(seed_value)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        insert_rows(connection, Film.__table__, film_rows(rng, size))
+        insert_rows(connection, User.__table__, user_rows(size))
+        insert_rows(connection, Review.__table__, review_rows(rng, size))
+        insert_rows(connection, Token.__table__, token_rows(rng, size))
+
+    # bulk inserts skip the review events that keep film aggregates
+    with Session(engine) as session:
+        manager.rebuild_film_aggregates(session=session)
+
+
+def add_size_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Size()
+    for name in Size._fields:
+        parser.add_argument(
+            f'--{name}', type=int, default=getattr(defaults, name)
+        )
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def parse_size(args: argparse.Namespace) -> Size:
+    return Size(*(getattr(args, name) for name in Size._fields))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    engine = create_db_engine(Settings(database_url='sqlite:///' + args.path))
+    seed(engine, parse_size(args), args.seed)
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Time the imports of the CLI, the data layer and a worker's app.
+
+Each target runs in a fresh interpreter with -X importtime from an empty
+directory, so the package must not depend on the working directory.
+Reports the median import time without the interpreter's own startup
+modules, the process wall time and the packages that took longest.
+
+    python -m benchmarks.import_time --repeat 5 --limit cli=300
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'package': 'import onlyfilms',
+    'cli': 'import onlyfilms.__main__',
+    'manager': 'import onlyfilms.manager',
+    'app': 'from onlyfilms.app import create_app; create_app()',
+}
+
+
+class Import(NamedTuple):
+    name: str
+    # microseconds in the module itself and with everything it imported
+    own: int
+    cumulative: int
+    top_level: bool
+
+
+class Run(NamedTuple):
+    imports: List[Import]
+    wall: float
+
+
+def parse(stderr: str) -> List[Import]:
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:') :].split('|')
+        # nested imports are indented under the module that imports them
+        top_level = not name[1:].startswith(' ')
+        imports.append(
+            Import(name.strip(), int(own), int(cumulative), top_level)
+        )
+    return imports
+
+
+def run(code: str, directory: str) -> Run:
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return Run(parse(process.stderr), time.perf_counter() - started)
+
+
+# import time by top level package, interpreter startup modules left out
+def by_package(imports: List[Import], startup: Set[str]) -> Dict[str, int]:
+    packages: Dict[str, int] = {}
+    for item in imports:
+        if item.name not in startup:
+            package = item.name.partition('.')[0]
+            packages[package] = packages.get(package, 0) + item.own
+    return packages
+
+
+def measure(
+    code: str, directory: str, startup: Set[str], repeat: int
+) -> Tuple[float, float, List[Tuple[str, int]]]:
+    runs = [run(code, directory) for _ in range(repeat)]
+    totals = [
+        sum(
+            x.cumulative
+            for x in item.imports
+            if x.top_level and x.name not in startup
+        )
+        for item in runs
+    ]
+    packages = by_package(runs[len(runs) // 2].imports, startup)
+    return (
+        statistics.median(totals) / 1000,
+        statistics.median(x.wall for x in runs) * 1000,
+        sorted(packages.items(), key=lambda x: -x[1]),
+    )
+
+
+def parse_limits(limits: List[str]) -> Dict[str, float]:
+    parsed = {}
+    for item in limits:
+        name, _, milliseconds = item.partition('=')
+        if name not in TARGETS:
+            raise SystemExit(f'Unknown target {name}, use one of {*TARGETS,}')
+        parsed[name] = float(milliseconds)
+    return parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument(
+        '--limit',
+        action='append',
+        default=[],
+        help='TARGET=MS, exit with 1 when the imports take longer',
+    )
+    args = parser.parse_args()
+    limits = parse_limits(args.limit)
+
+    exceeded = []
+    with tempfile.TemporaryDirectory() as directory:
+        startup = {x.name for x in run('pass', directory).imports}
+        for name, code in TARGETS.items():
+            imports, wall, packages = measure(
+                code, directory, startup, args.repeat
+            )
+            print(
+                f'{name:>8}: imports {imports:6.0f} ms, process {wall:6.0f} ms'
+            )
+            for package, own in packages[: args.top]:
+                print(f'{"":>10}{package:<24} {own / 1000:6.0f} ms')
+            if name in limits and imports > limits[name]:
+                exceeded.append(f'{name} {imports:.0f} > {limits[name]:.0f} ms')
+
+    for line in exceeded:
+        print(f'REGRESSION: {line}')
+    if exceeded:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Latency of /api/films/ while other clients hammer /api/login.
+
+Runs the app under uvicorn in-process against a temporary database and
+compares inline bcrypt (ONLYFILMS_HASH_WORKERS=0) with the worker pool.
+
+    python -m benchmarks.login_storm --duration 10 --storm 16
+"""
+import argparse
+import statistics
+import threading
+import time
+from typing import List
+from unittest import mock
+
+from benchmarks.common import (
+    percentile,
+    request,
+    running_server,
+    temporary_database,
+)
+from onlyfilms import hashing
+from onlyfilms.app import create_app
+from onlyfilms.models.orm import Film, User
+
+LOGIN = {'login': 'storm_user', 'password': 'storm_password'}
+
+
+def storm(base: str, stop: threading.Event, statuses: List[int]) -> None:
+    while not stop.is_set():
+        statuses.append(request(base + '/api/login', LOGIN))
+
+
+def scenario(base: str, duration: float, storm_clients: int) -> None:
+    stop = threading.Event()
+    statuses: List[int] = []
+    clients = [
+        threading.Thread(target=storm, args=(base, stop, statuses))
+        for _ in range(storm_clients)
+    ]
+    for client in clients:
+        client.start()
+
+    latencies = []
+    finish = time.perf_counter() + duration
+    while time.perf_counter() < finish:
+        started = time.perf_counter()
+        request(base + '/api/films/?limit=10')
+        latencies.append(time.perf_counter() - started)
+
+    stop.set()
+    for client in clients:
+        client.join()
+
+    rejected = sum(status == 503 for status in statuses)
+    print(
+        f'  films p50 {statistics.median(latencies) * 1000:8.2f} ms, '
+        f'p99 {percentile(latencies, 0.99) * 1000:8.2f} ms '
+        f'({len(latencies)} requests); logins {len(statuses)}, '
+        f'503: {rejected}'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--storm', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=12)
+    args = parser.parse_args()
+
+    with temporary_database() as session_creator:
+        with session_creator() as session:
+            session.add_all([Film(f'film #{x}') for x in range(50)])
+            password_hash = hashing.hash_password(
+                LOGIN['password'], args.rounds
+            )
+            session.add(User(LOGIN['login'], password_hash=password_hash))
+            session.commit()
+
+        with running_server(create_app()) as base:
+            print('idle')
+            scenario(base, args.duration, 0)
+            for workers in (0, hashing.hasher.workers):
+                hasher = hashing.PasswordHasher(
+                    workers,
+                    hashing.hasher.queue_limit,
+                    hashing.hasher.retry_after,
+                )
+                with mock.patch.object(hashing, 'hasher', hasher):
+                    print(f'login storm, hash workers: {workers}')
+                    scenario(base, args.duration, args.storm)
+                hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Throughput of the HTML pages under uvicorn.
+
+Serves the app from a separate process against a temporary database with
+1000 films and requests the index and a film page, anonymously and with
+a logged in user.
+
+    python -m benchmarks.pages --duration 10 --clients 1 16
+"""
+import argparse
+import os
+import tempfile
+from typing import Dict, Optional
+
+from benchmarks.async_api import throughput
+from benchmarks.common import database_sessions, server_process
+from onlyfilms.models.orm import Film, Review, Token, User
+
+PAGES = [('index', '/onlyfilms/'), ('film', '/onlyfilms/film/1')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        with database_sessions(path) as session_creator:
+            with session_creator() as session:
+                films = [
+                    Film(f'film #{x}', 'director', f'https://covers/{x}.jpg')
+                    for x in range(1000)
+                ]
+                users = [User(f'user {x}', password_hash=b'') for x in range(5)]
+                token = Token(users[0])
+                session.add_all([*films, *users, token])
+                session.add_all(
+                    Review(user, films[0], f'review of {user.login}', 7)
+                    for user in users
+                )
+                session.commit()
+
+        users: Dict[str, Optional[Dict[str, str]]] = {
+            'anonymous': None,
+            'user': {'Authorization': token.token},
+        }
+        with server_process(path, 'onlyfilms.app:create_app') as base:
+            for clients in args.clients:
+                for page, route in PAGES:
+                    for user, headers in users.items():
+                        rate = throughput(
+                            base + route, clients, args.duration, headers
+                        )
+                        print(
+                            f'{clients:>4} clients, {page:>5} {user:>9}: '
+                            f'{rate:8.1f} req/s'
+                        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Compare LIKE and FTS5 film search on synthetic catalogs.
+
+    python -m benchmarks.search --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Iterator, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from onlyfilms import Base, manager, search
+from onlyfilms.database import create_db_engine
+from onlyfilms.models.orm import Film
+from onlyfilms.settings import Settings
+
+SYLLABLES = ['ka', 'ri', 'mo', 'ne', 'to', 'sa', 'lu', 'vi', 'de', 'ga']
+# a zipf-like vocabulary: word i is drawn with weight 1 / (i + 1)
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+WEIGHTS = [1 / (i + 1) for i in range(len(WORDS))]
+QUERIES = [WORDS[0], WORDS[50][:4], f'{WORDS[10]} {WORDS[200]}', 'zzz']
+BATCH = 10000
+
+
+def words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choices(WORDS, WEIGHTS, k=count))
+
+
+def random_films(count: int) -> Iterator[List[dict]]:
+    rng = random.Random(count)
+    batch = []
+    for i in range(count):
+        batch.append(
+            {
+                'title': words(rng, 3) + f' {i}',
+                'director': words(rng, 2),
+                'description': words(rng, 20),
+                'score_sum': 0,
+                'score_count': 0,
+                'review_count': 0,
+            }
+        )
+        if len(batch) == BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def measure(
+    session_creator: sessionmaker, backend: str, query: str, repeat: int
+) -> float:
+    search.DEFAULT_BACKEND = backend
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with session_creator() as session:
+            manager.get_film_rows(query, session=session)
+    return (time.perf_counter() - started) / repeat
+
+
+def run(size: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(
+            Settings(
+                database_url='sqlite:///' + os.path.join(directory, 'b.db')
+            )
+        )
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for batch in random_films(size):
+                connection.execute(insert(Film.__table__), batch)
+
+        session_creator = sessionmaker(engine, expire_on_commit=False)
+        for query in QUERIES:
+            like = measure(session_creator, 'like', query, repeat)
+            fts = measure(session_creator, 'fts5', query, repeat)
+            print(
+                f'{size:>9} films, q={query!r:<16} '
+                f'like {like * 1000:9.2f} ms, fts5 {fts * 1000:9.2f} ms, '
+                f'x{like / fts:.1f}'
+            )
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000]
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Time building the JSON body of 50 item film and review pages.
+
+Compares pydantic models built with from_orm from ORM entities against
+the plain column rows encoded with orjson, database query included.
+
+    python -m benchmarks.serialization --repeat 2000
+"""
+import argparse
+import time
+from typing import Callable
+
+import orjson
+from sqlalchemy import func as sql_func
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from benchmarks.common import temporary_database
+from onlyfilms import manager
+from onlyfilms.manager.base import paginate
+from onlyfilms.models import response_models
+from onlyfilms.models.orm import Film, Review, User
+
+PAGE = 50
+
+
+def models_films(session: Session) -> bytes:
+    # the ORM entities the pydantic models are built from, paged the way
+    # the manager pages rows
+    films, total = paginate(
+        session.query(Film, manager.FILM_SCORE, Film.review_count).order_by(
+            Film.id
+        ),
+        select(sql_func.count(Film.id)).scalar_subquery(),
+        0,
+        PAGE,
+        session,
+    )
+    models = []
+    for film, score, evaluators, _ in films:
+        model = response_models.FilmModel.from_orm(film)
+        model.score = score
+        model.evaluators = evaluators
+        models.append(model)
+    page = response_models.Films(films=models, total=total, offset=0)
+    return page.json().encode('utf-8')
+
+
+def rows_films(session: Session) -> bytes:
+    films, total = manager.get_film_rows('', 0, PAGE, session=session)
+    return orjson.dumps(
+        {
+            'films': [response_models.film_row(film) for film in films],
+            'total': total.value,
+            'offset': 0,
+            'next_cursor': None,
+        }
+    )
+
+
+def models_reviews(session: Session) -> bytes:
+    reviews, total = paginate(
+        session.query(Review)
+        .options(joinedload(Review.author))
+        .filter(Review.film_id == 1)
+        .order_by(Review.created, Review.id),
+        select(Film.review_count).where(Film.id == 1).scalar_subquery(),
+        0,
+        PAGE,
+        session,
+    )
+    page = response_models.Reviews(
+        reviews=[response_models.ReviewModel.from_orm(x) for x, _ in reviews],
+        total=total,
+        offset=0,
+    )
+    return page.json().encode('utf-8')
+
+
+def rows_reviews(session: Session) -> bytes:
+    reviews, total = manager.get_review_rows(1, PAGE, 0, session=session)
+    return orjson.dumps(
+        {
+            'reviews': [response_models.review_row(x) for x in reviews],
+            'total': total.value,
+            'offset': 0,
+            'next_cursor': None,
+        }
+    )
+
+
+def measure(
+    session: Session, build: Callable[[Session], bytes], repeat: int
+) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        build(session)
+        session.expunge_all()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    with temporary_database() as session_creator:
+        with session_creator() as session:
+            films = [
+                Film(f'film #{x}', 'director', f'https://covers/{x}.jpg')
+                for x in range(PAGE)
+            ]
+            users = [User(f'user {x}', password_hash=b'') for x in range(PAGE)]
+            session.add_all(films + users)
+            session.add_all(
+                Review(user, films[0], f'review of {user.login}', 7)
+                for user in users
+            )
+            session.commit()
+
+        with session_creator() as session:
+            for name, models, rows in [
+                ('films', models_films, rows_films),
+                ('reviews', models_reviews, rows_reviews),
+            ]:
+                before = measure(session, models, args.repeat)
+                after = measure(session, rows, args.repeat)
+                print(
+                    f'{name:>7}: from_orm {before * 1e6:8.0f} us, '
+                    f'rows {after * 1e6:8.0f} us ({before / after:.1f}x)'
+                )
+
+
+if __name__ == '__main__':
+    main()
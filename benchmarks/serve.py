@@ -0,0 +1,21 @@
+"""python -m benchmarks.serve DATABASE PORT [MODULE:FACTORY]"""
+import importlib
+import sys
+
+import uvicorn
+
+from benchmarks.common import database_sessions
+
+
+def main() -> None:
+    path, port = sys.argv[1], int(sys.argv[2])
+    factory = sys.argv[3] if len(sys.argv) > 3 else 'onlyfilms.app:create_app'
+    module, name = factory.split(':')
+
+    with database_sessions(path):
+        app = getattr(importlib.import_module(module), name)()
+        uvicorn.run(app, port=port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
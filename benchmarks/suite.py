@@ -0,0 +1,310 @@
+"""Regression suite on a seeded dataset from benchmarks.dataset.
+
+Times the manager functions one call at a time, then requests through the
+app in process (starlette's TestClient, no network). The statistics follow
+pytest-benchmark: min, max, mean, median and stddev in seconds, plus calls
+per second. Pass --output to save them as JSON and --compare with an
+earlier file to print the change of every median; the exit status is 1
+when one grew by more than --threshold.
+
+    python -m benchmarks.suite --films 10000 --users 2000 --reviews 100000 \
+        --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from unittest import mock
+
+import sqlalchemy
+from fastapi.testclient import TestClient
+
+from benchmarks.common import database_sessions
+from benchmarks.dataset import (
+    PASSWORD,
+    Size,
+    add_size_arguments,
+    login,
+    parse_size,
+    seed,
+)
+from benchmarks.search import WORDS
+from onlyfilms import logger, manager, response_cache
+from onlyfilms.app import create_app
+from onlyfilms.manager import NewReview
+from onlyfilms.models.orm import Token
+from onlyfilms.settings import settings
+
+
+class Benchmark(NamedTuple):
+    name: str
+    call: Callable[[], object]
+    # runs before every call, untimed
+    setup: Optional[Callable[[], object]] = None
+    # for calls too slow to repeat --rounds times
+    rounds: Optional[int] = None
+
+
+def measure(benchmark: Benchmark, rounds: int, warmup: int) -> Dict:
+    rounds = benchmark.rounds or rounds
+    timings = []
+    for step in range(warmup + rounds):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        started = time.perf_counter()
+        benchmark.call()
+        elapsed = time.perf_counter() - started
+        if step >= warmup:
+            timings.append(elapsed)
+    # leaves the database as the next benchmark expects it
+    if benchmark.setup is not None:
+        benchmark.setup()
+
+    mean = statistics.mean(timings)
+    return {
+        'name': benchmark.name,
+        'rounds': rounds,
+        'min': min(timings),
+        'max': max(timings),
+        'mean': mean,
+        'median': statistics.median(timings),
+        'stddev': statistics.stdev(timings) if rounds > 1 else 0.0,
+        'ops': 1 / mean,
+    }
+
+
+def cycle(values: List) -> Callable[[], object]:
+    return itertools.cycle(values).__next__
+
+
+def live_tokens(count: int) -> List[str]:
+    with manager.base.SessionCreator() as session:
+        tokens = (
+            session.query(Token.token)
+            .filter(Token.created > datetime.datetime.now() - Token.EXPIRE)
+            .limit(count)
+        )
+        return [token for (token,) in tokens]
+
+
+# film 1 is the most reviewed one, film N the least
+def manager_benchmarks(size: Size) -> Iterator[Benchmark]:
+    films = cycle([1, 2, size.films // 2, size.films])
+    users = cycle(range(1, size.users + 1))
+    tokens = cycle(live_tokens(100) or ['missing'])
+    user = manager.get_user_by_login(login(1))
+    word = WORDS[0]
+    _, cursor = manager.get_film_rows_after(limit=10)
+    reviews, review_cursor = manager.get_review_rows_after(1, limit=10)
+    review = reviews[0]
+    film = films()
+
+    yield Benchmark('get_film_by_id', lambda: manager.get_film_by_id(films()))
+    yield Benchmark('get_film_rows', lambda: manager.get_film_rows(limit=50))
+    yield Benchmark(
+        'get_film_rows.deep',
+        lambda: manager.get_film_rows(offset=size.films // 2),
+    )
+    yield Benchmark('get_film_rows.search', lambda: manager.get_film_rows(word))
+    yield Benchmark(
+        'get_film_rows_after',
+        lambda: manager.get_film_rows_after(cursor=cursor),
+    )
+    yield Benchmark(
+        'get_review_rows', lambda: manager.get_review_rows(film, limit=50)
+    )
+    yield Benchmark(
+        'get_review_rows_after',
+        lambda: manager.get_review_rows_after(1, review_cursor),
+    )
+    yield Benchmark('get_film_page', lambda: manager.get_film_page(films()))
+    yield Benchmark(
+        'get_review_by_id',
+        lambda: manager.get_review_by_id(review.id, review.film_id),
+    )
+    yield Benchmark(
+        'get_user_by_login', lambda: manager.get_user_by_login(login(users()))
+    )
+    yield Benchmark(
+        'get_user_ids',
+        lambda: manager.get_user_ids(login(x) for x in range(1, 101)),
+    )
+    yield Benchmark(
+        'get_film_ids',
+        lambda: manager.get_film_ids(f'bench{x}' for x in range(1, 101)),
+    )
+    yield Benchmark('get_token', lambda: manager.get_token(tokens()))
+    yield Benchmark(
+        'login_user', lambda: manager.login_user(login(users()), PASSWORD)
+    )
+    # rows written by a round are removed before the next one, untimed
+    tokens_created: List[str] = []
+    reviews_created: List[int] = []
+
+    def cleanup() -> None:
+        while tokens_created:
+            manager.delete_token(tokens_created.pop())
+        while reviews_created:
+            manager.delete_review(reviews_created.pop(), user)
+
+    yield Benchmark(
+        'create_token',
+        lambda: tokens_created.append(manager.create_token(user)),
+        cleanup,
+    )
+    yield Benchmark(
+        'post_review',
+        lambda: reviews_created.append(
+            manager.post_review(size.films, user, 'bench', 5)[1]
+        ),
+        cleanup,
+    )
+    yield Benchmark(
+        'post_reviews',
+        lambda: reviews_created.extend(
+            review_id
+            for _, review_id in manager.post_reviews(
+                [NewReview(1, x, 'bench', 5) for x in range(1, 101)]
+            )
+            if review_id is not None
+        ),
+        cleanup,
+        rounds=10,
+    )
+    yield Benchmark(
+        'purge_expired_tokens', lambda: manager.purge_expired_tokens()
+    )
+    yield Benchmark(
+        'rebuild_film_aggregates',
+        lambda: manager.rebuild_film_aggregates(verify_only=True),
+        rounds=5,
+    )
+
+
+# every call runs cold unless it is a *.cached one
+def asgi_benchmarks(client: TestClient, size: Size) -> Iterator[Benchmark]:
+    token = client.post(
+        '/api/login', json={'login': login(1), 'password': PASSWORD}
+    ).json()['token']
+    headers = {'authorization': token}
+    cold = response_cache.invalidate_all
+    routes = {
+        'films': '/api/films?limit=50',
+        'films.search': f'/api/films?q={WORDS[0]}',
+        'film': '/api/films/1',
+        'film_page': '/api/films/1/page',
+        'reviews': '/api/films/1/reviews?limit=50',
+        'html.index': '/onlyfilms/',
+        'html.film': '/onlyfilms/film/1',
+    }
+
+    for name, route in routes.items():
+        yield Benchmark(
+            f'GET {name}', lambda route=route: client.get(route), cold
+        )
+    for name in ['films', 'film_page']:
+        yield Benchmark(
+            f'GET {name}.cached', lambda route=routes[name]: client.get(route)
+        )
+    yield Benchmark(
+        'GET html.film.user',
+        lambda: client.get(routes['html.film'], headers=headers),
+        cold,
+    )
+    users = cycle(range(2, size.users + 1))
+    yield Benchmark(
+        'POST login',
+        lambda: client.post(
+            '/api/login', json={'login': login(users()), 'password': PASSWORD}
+        ),
+    )
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> bool:
+    before = {x['name']: x for x in baseline['benchmarks']}
+    regressed = False
+    for result in results:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        ratio = result['median'] / old['median']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(
+            f'{result["name"]:>28}: {old["median"] * 1e6:10.1f} us -> '
+            f'{result["median"] * 1e6:10.1f} us  x{ratio:5.2f}{flag}'
+        )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_size_arguments(parser)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+    size = parse_size(args)
+    # every login would log a line
+    logger.setLevel(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        started = time.perf_counter()
+        with database_sessions(path) as session_creator:
+            seed(session_creator.kw['bind'], size, args.seed)
+            print(f'dataset {size}: {time.perf_counter() - started:.1f}s')
+
+            # the sweeper would purge the expired tokens under the benchmarks
+            with mock.patch.object(settings, 'token_purge_interval', 0):
+                for benchmark in manager_benchmarks(size):
+                    results.append(measure(benchmark, args.rounds, args.warmup))
+                with TestClient(create_app()) as client:
+                    for benchmark in asgi_benchmarks(client, size):
+                        results.append(
+                            measure(benchmark, args.rounds, args.warmup)
+                        )
+
+    for result in results:
+        print(
+            f'{result["name"]:>28}: median {result["median"] * 1e6:10.1f} us'
+            f', stddev {result["stddev"] * 1e6:9.1f} us'
+            f', {result["ops"]:9.1f} ops/s'
+        )
+
+    if args.output:
+        report = {
+            'created': datetime.datetime.now().isoformat(),
+            'machine': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'sqlalchemy': sqlalchemy.__version__,
+            },
+            'dataset': {**size._asdict(), 'seed': args.seed},
+            'benchmarks': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,58 @@
 import logging
 import logging.config
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
 
-from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-DB = 'sqlite:///films.db?check_same_thread=False'
+from onlyfilms.database import (
+    create_async_db_engine,
+    create_db_engine,
+    dispose_after_fork,
+)
+from onlyfilms.settings import settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 logging.config.fileConfig(
-    './onlyfilms/logger.conf', disable_existing_loggers=False
+    Path(__file__).with_name('logger.conf'), disable_existing_loggers=False
 )
 logger = logging.getLogger(__name__)
 
 logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
-engine = create_engine(DB)
+
+# engines are created on first use, so commands and tests that never touch
+# the database don't import drivers or open pools
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    engine = create_db_engine(settings)
+    dispose_after_fork(engine)
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> 'AsyncEngine':
+    engine = create_async_db_engine(settings)
+    dispose_after_fork(engine.sync_engine)
+    return engine
+
+
+class LazySessionMaker(sessionmaker):
+    def __init__(self, get_bind: Callable[[], Any], **kw: Any) -> None:
+        super().__init__(**kw)
+        self.get_bind = get_bind
+        self.bound = False
+
+    def __call__(self, **local_kw: Any) -> Any:
+        if not self.bound:
+            self.configure(bind=self.get_bind())
+            self.bound = True
+        return super().__call__(**local_kw)
+
+
 Base = declarative_base()
-Session = sessionmaker(engine, expire_on_commit=False)
+Session = LazySessionMaker(get_engine, expire_on_commit=False)
@@ -1,34 +1,175 @@
-import uvicorn
-from fastapi import FastAPI
-from fastapi.middleware.wsgi import WSGIMiddleware
-from typer import Typer
+import os
+import secrets
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
 
-from onlyfilms import Base, engine, logger
-from onlyfilms.api import api
-from onlyfilms.view import app as interface_app
+from typer import Argument, Exit, Option, Typer
 
-args_parser = Typer()
+from onlyfilms import logger
+from onlyfilms.settings import settings
+
+if TYPE_CHECKING:
+    from onlyfilms.importer import ImportResult
 
+args_parser = Typer()
 
-def create_app() -> FastAPI:
-    app = FastAPI()
-    app.include_router(api.router)
-    app.mount('/onlyfilms/', WSGIMiddleware(interface_app.app))
-    logger.info('App was created: %s', app)
 
-    return app
+# spawned workers read the settings from the environment again
+def share_secret_key() -> None:
+    if settings.secret_key is None:
+        os.environ['ONLYFILMS_SECRET_KEY'] = secrets.token_hex(32)
+        logger.warning(
+            'ONLYFILMS_SECRET_KEY is not set, admin sessions and signed '
+            'tokens stop working when the server restarts'
+        )
 
 
 @args_parser.command(name='init')
 def init_db() -> None:
-    Base.metadata.create_all(engine)
+    # commands import what they use, so the CLI starts without the web stack
+    from onlyfilms import (  # pylint: disable=import-outside-toplevel
+        get_engine,
+        migrations,
+    )
+
+    for migration in migrations.migrate(get_engine()):
+        logger.info(
+            'Migration %d applied: %s', migration.version, migration.name
+        )
     logger.info('Database is successfully initialized')
 
 
+@args_parser.command(name='aggregates')
+def rebuild_aggregates(
+    check: bool = Option(False, '--check', help='Only verify aggregates')
+) -> None:
+    from onlyfilms import manager  # pylint: disable=import-outside-toplevel
+
+    mismatched = manager.rebuild_film_aggregates(verify_only=check)
+    if check and mismatched:
+        logger.warning('Films with stale aggregates: %d', mismatched)
+        raise Exit(code=1)
+
+    logger.info('Film aggregates are consistent (fixed: %d)', mismatched)
+
+
+@args_parser.command(name='reindex')
+def rebuild_search_index() -> None:
+    from onlyfilms import manager  # pylint: disable=import-outside-toplevel
+
+    manager.rebuild_search_index()
+    logger.info('Search index is rebuilt')
+
+
+def run_import(load: Callable[[], 'ImportResult']) -> None:
+    try:
+        result = load()
+    except ValueError as error:
+        logger.error('%s', error)
+        raise Exit(code=1) from error
+
+    logger.info(
+        'Rows imported: %d, updated: %d, invalid: %d',
+        result.inserted,
+        result.updated,
+        result.invalid,
+    )
+
+
+@args_parser.command(name='import')
+def import_films(
+    path: Path = Argument(..., exists=True, dir_okay=False),
+    batch_size: int = Option(1000, '--batch-size', min=1),
+    upsert: bool = Option(
+        True, '--upsert/--no-upsert', help='Update films by external_id'
+    ),
+    restart: bool = Option(
+        False, '--restart', help='Ignore progress of an interrupted import'
+    ),
+    file_format: Optional[str] = Option(
+        None, '--format', help='csv or jsonl, guessed from the file suffix'
+    ),
+) -> None:
+    from onlyfilms import importer  # pylint: disable=import-outside-toplevel
+
+    run_import(
+        lambda: importer.import_films(
+            path, batch_size, upsert, not restart, file_format
+        )
+    )
+
+
+@args_parser.command(name='import-reviews')
+def import_reviews(
+    path: Path = Argument(..., exists=True, dir_okay=False),
+    batch_size: int = Option(1000, '--batch-size', min=1),
+    restart: bool = Option(
+        False, '--restart', help='Ignore progress of an interrupted import'
+    ),
+    file_format: Optional[str] = Option(
+        None, '--format', help='csv or jsonl, guessed from the file suffix'
+    ),
+) -> None:
+    from onlyfilms import importer  # pylint: disable=import-outside-toplevel
+
+    run_import(
+        lambda: importer.import_reviews(
+            path, batch_size, not restart, file_format
+        )
+    )
+
+
+@args_parser.command(name='purge-tokens')
+def purge_tokens(
+    batch_size: int = Option(settings.token_purge_batch, '--batch-size', min=1),
+) -> None:
+    from onlyfilms import manager  # pylint: disable=import-outside-toplevel
+
+    purged = manager.purge_expired_tokens(batch_size)
+    logger.info('Expired tokens purged: %d', purged)
+
+
 @args_parser.command()
-def start() -> None:
-    app = create_app()
-    uvicorn.run(app)
+def start(
+    host: Optional[str] = Option(None, '--host', help='ONLYFILMS_SERVER_HOST'),
+    port: Optional[int] = Option(None, '--port', help='ONLYFILMS_SERVER_PORT'),
+    workers: Optional[int] = Option(
+        None, '--workers', min=1, help='ONLYFILMS_SERVER_WORKERS'
+    ),
+) -> None:
+    # uvicorn and the hashing pool are only needed by the server
+    from onlyfilms import server  # pylint: disable=import-outside-toplevel
+    from onlyfilms.hashing import (  # pylint: disable=import-outside-toplevel
+        hasher,
+    )
+
+    overrides = {
+        'server_host': host,
+        'server_port': port,
+        'server_workers': workers,
+    }
+    options = settings.copy(
+        update={k: v for k, v in overrides.items() if v is not None}
+    )
+    config = server.create_config(options)
+    if config.workers > 1:
+        share_secret_key()
+        if settings.response_cache_url.startswith('memory://'):
+            if settings.token_backend == 'signed':
+                # a logout would only revoke the token in one worker
+                logger.error(
+                    'Signed tokens are revoked in the response cache, set '
+                    'ONLYFILMS_RESPONSE_CACHE_URL to a redis:// URL to run '
+                    'several workers'
+                )
+                raise Exit(code=1)
+            logger.warning(
+                'Each worker caches responses in memory and does not see '
+                'the writes of the others, set ONLYFILMS_RESPONSE_CACHE_URL '
+                'to a redis:// URL'
+            )
+    server.serve(config, options.server_graceful_timeout)
+    hasher.shutdown()
 
 
 if __name__ == '__main__':
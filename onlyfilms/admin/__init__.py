@@ -1,12 +1,13 @@
 from flask import Flask
 from flask_admin import Admin
 
-from onlyfilms.admin.views import views
+from onlyfilms.admin.views import admin_session, views
 
 
-def create_admin(app: Flask) -> Admin:
+def create_admin(app: Flask, url: str = '/admin') -> Admin:
 
-    admin = Admin(app)
+    admin = Admin(app, url=url)
     admin.add_views(*views)
+    app.teardown_appcontext(lambda _: admin_session.remove())
 
     return admin
@@ -0,0 +1,11 @@
+import secrets
+
+from flask import Flask
+
+from onlyfilms.admin import create_admin
+from onlyfilms.settings import settings
+
+app = Flask(__name__)
+app.config['SECRET_KEY'] = settings.secret_key or secrets.token_hex(16)
+
+create_admin(app, url='/')
@@ -1,18 +1,47 @@
+from typing import Any
+
 from flask_admin.contrib.sqla import ModelView
+from sqlalchemy.orm import scoped_session
 
-from onlyfilms import Session
-from onlyfilms.models.orm import Film, Review, Token, User
+from onlyfilms import Session, auth
+from onlyfilms.models.orm import FILM_AGGREGATES, Film, Review, Token, User
 
-admin_session = Session()
+# a session per request thread, removed when the request ends
+admin_session = scoped_session(Session)
 
 
 class UserView(ModelView):
     column_exclude_list = ['password']
 
 
+class FilmView(ModelView):
+    form_excluded_columns = ['reviews', *FILM_AGGREGATES]
+
+
+class TokenView(ModelView):
+    def after_model_change(
+        self, form: Any, model: Token, is_created: bool
+    ) -> None:
+        auth.token_cache.clear()
+
+    def on_model_delete(self, model: Token) -> None:
+        auth.forget_token(model.token)
+
+
+class ReviewView(ModelView):
+    # film aggregates are updated by the database, so cached films are stale
+    def after_model_change(
+        self, form: Any, model: Review, is_created: bool
+    ) -> None:
+        self.session.expire_all()
+
+    def after_model_delete(self, model: Review) -> None:
+        self.session.expire_all()
+
+
 views = [
     UserView(User, admin_session),
-    ModelView(Film, admin_session),
-    ModelView(Token, admin_session),
-    ModelView(Review, admin_session),
+    FilmView(Film, admin_session),
+    TokenView(Token, admin_session),
+    ReviewView(Review, admin_session),
 ]
@@ -3,26 +3,20 @@ from typing import Optional
 
 from fastapi import Header, HTTPException
 
-from onlyfilms import Session
-from onlyfilms.models.orm import Token, User
+from onlyfilms.auth import AuthUser, resolve_token_async
 
 
-def authorized(authorization: Optional[str] = Header(None)) -> User:
+async def authorized(authorization: Optional[str] = Header(None)) -> AuthUser:
     if not authorization:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Authorization requied'
         )
 
-    with Session() as session:
-        token: Token = (
-            session.query(Token).filter(Token.token == authorization).first()
-        )
-
-        if token is None:
-            raise HTTPException(
-                status_code=HTTPStatus.FORBIDDEN, detail='Authorization faild'
-            )
+    user = await resolve_token_async(authorization)
 
-        user = token.user
+    if user is None:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN, detail='Authorization faild'
+        )
 
     return user
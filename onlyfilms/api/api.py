@@ -1,10 +1,12 @@
 from http import HTTPStatus
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 
-from onlyfilms import logger, manager
-from onlyfilms.api import films
+from onlyfilms import async_manager, auth, logger
+from onlyfilms.api import authorized, films
+from onlyfilms.hashing import HashingOverloaded
 from onlyfilms.models.request_models import RegisterModel
 
 router = APIRouter(prefix='/api')
@@ -13,8 +15,10 @@ router.include_router(films.router, prefix='/films')
 
 
 @router.post('/register', status_code=HTTPStatus.ACCEPTED)
-def register_handler(user_model: RegisterModel) -> Any:
-    if not manager.regster_user(user_model.login, user_model.password):
+async def register_handler(user_model: RegisterModel) -> Any:
+    if not await async_manager.regster_user(
+        user_model.login, user_model.password
+    ):
         logger.warning('Can not add new user %s', user_model.login)
         raise HTTPException(status_code=HTTPStatus.NOT_ACCEPTABLE)
 
@@ -23,18 +27,35 @@ def register_handler(user_model: RegisterModel) -> Any:
 
 
 @router.post('/login', status_code=HTTPStatus.ACCEPTED)
-def login_handler(user_model: RegisterModel) -> Any:
+async def login_handler(user_model: RegisterModel) -> Any:
 
-    token = manager.login_user(user_model.login, user_model.password)
+    token = await async_manager.login_user(
+        user_model.login, user_model.password
+    )
 
     if not token:
         logger.warning('Wrong user or password for user %s', user_model.login)
         raise HTTPException(status_code=HTTPStatus.NOT_ACCEPTABLE)
 
-    logger.info(
-        'User with login %s logged in successfully, token: %s',
-        user_model.login,
-        token,
-    )
+    logger.info('User with login %s logged in successfully', user_model.login)
 
     return {'token': token}
+
+
+@router.post('/logout', status_code=HTTPStatus.OK)
+async def logout_handler(
+    user: auth.AuthUser = Depends(authorized),
+    authorization: str = Header(...),
+) -> Any:
+    await auth.logout_async(authorization)
+    logger.info('User with login %s logged out', user.login)
+
+
+def hashing_overloaded_handler(
+    _: Request, error: HashingOverloaded
+) -> JSONResponse:
+    return JSONResponse(
+        {'detail': str(error)},
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(error.retry_after)},
+    )
@@ -1,41 +1,135 @@
 from http import HTTPStatus
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
 
-from onlyfilms import logger, manager
+from onlyfilms import async_manager, logger, response_cache
 from onlyfilms.api import authorized
+from onlyfilms.auth import AuthUser
+from onlyfilms.manager import NewReview, Total
 from onlyfilms.models import response_models
-from onlyfilms.models.orm import User
-from onlyfilms.models.request_models import ReviewModel
+from onlyfilms.models.request_models import ReviewBatchModel, ReviewModel
 
 router = APIRouter()
 
+# format=ndjson streams every matching row, one JSON object per line
+OUTPUT_FORMAT = Query('json', alias='format', regex='^(json|ndjson)$')
+
+
+def ndjson(
+    batches: AsyncIterator[List[Row]], encode: Callable[[Row], Dict[str, Any]]
+) -> StreamingResponse:
+    async def lines() -> AsyncIterator[bytes]:
+        async for rows in batches:
+            yield b''.join(orjson.dumps(encode(row)) + b'\n' for row in rows)
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
+# offset pages unless a cursor of a previous page is given
+class Page:
+    def __init__(
+        self,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(10, le=50),
+        cursor: Optional[str] = Query(None, max_length=200),
+    ) -> None:
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+
+
+def total_fields(total: Optional[Total]) -> Dict[str, Any]:
+    if total is None:
+        return {'total': None, 'total_exact': None}
+    return {'total': total.value, 'total_exact': total.exact}
+
 
 @router.get(
     '/', response_model=response_models.Films, status_code=HTTPStatus.OK
 )
-def main_handler(
-    query: Optional[str] = Query('', alias='q', max_length=200),
-    offset: int = Query(0, ge=0),
-    limit: int = Query(10, le=50),
+async def main_handler(
+    request: Request,
+    query: str = Query('', alias='q', max_length=200),
+    page: Page = Depends(),
+    output: str = OUTPUT_FORMAT,
 ) -> Any:
+    if output == 'ndjson':
+        return ndjson(
+            async_manager.stream_film_rows(query), response_models.film_row
+        )
+
+    async def build() -> Dict[str, Any]:
+        total: Optional[Total] = None
+        next_cursor: Optional[str] = None
+        if page.cursor is None:
+            films, total = await async_manager.get_film_rows(
+                query, page.offset, page.limit
+            )
+        else:
+            try:
+                films, next_cursor = await async_manager.get_film_rows_after(
+                    query, page.cursor, page.limit
+                )
+            except ValueError as error:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST, detail=str(error)
+                ) from error
+
+        return {
+            'films': [response_models.film_row(film) for film in films],
+            **total_fields(total),
+            'offset': None if page.cursor is not None else page.offset,
+            'next_cursor': next_cursor,
+        }
+
+    key = response_cache.films_key(
+        'list', query, page.offset, page.limit, page.cursor
+    )
+    return await response_cache.cached_json(request, key, build)
 
-    films, total = manager.get_films(query, offset, limit)
-    films_models = []
-    for film, score, evaluators in films:
-        model = response_models.FilmModel.from_orm(film)
-        model.score = score
-        model.evaluators = evaluators
-        films_models.append(model)
-    return response_models.Films(films=films_models, total=total, offset=offset)
+
+@router.post(
+    '/reviews:batch',
+    response_model=response_models.ReviewBatchResult,
+    status_code=HTTPStatus.OK,
+)
+async def review_batch_handler(
+    batch: ReviewBatchModel, user: AuthUser = Depends(authorized)
+) -> Any:
+    statuses = await async_manager.post_reviews(
+        [
+            NewReview(user.id, review.film_id, review.text, review.score)
+            for review in batch.reviews
+        ]
+    )
+
+    results = [
+        response_models.ReviewStatus(
+            film_id=review.film_id, status=status, review_id=review_id
+        )
+        for review, (status, review_id) in zip(batch.reviews, statuses)
+    ]
+    created = sum(status == HTTPStatus.CREATED for status, _ in statuses)
+    logger.info(
+        'User %s with id %d left %d of %d reviews',
+        user.login,
+        user.id,
+        created,
+        len(statuses),
+    )
+
+    return response_models.ReviewBatchResult(results=results, created=created)
 
 
 @router.post('/{film_id}/review', status_code=HTTPStatus.CREATED)
-def review_handler(
-    film_id: int, review: ReviewModel, user: User = Depends(authorized)
+async def review_handler(
+    film_id: int, review: ReviewModel, user: AuthUser = Depends(authorized)
 ) -> Any:
-    status, post_id = manager.post_review(
+    status, post_id = await async_manager.post_review(
         film_id, user, review.text, review.score
     )
 
@@ -43,11 +137,10 @@ def review_handler(
         raise HTTPException(status_code=status)
 
     logger.info(
-        'User %s with id %d left a review to film with id %d: %s',
+        'User %s with id %d left a review to film with id %d',
         user.login,
         user.id,
         film_id,
-        review.text,
     )
 
     return {'review_id': post_id}
@@ -58,8 +151,8 @@ def review_handler(
     response_model=response_models.ReviewModel,
     status_code=HTTPStatus.OK,
 )
-def review_info_handler(film_id: int, review_id: int) -> Any:
-    review = manager.get_review_by_id(review_id, film_id)
+async def review_info_handler(film_id: int, review_id: int) -> Any:
+    review = await async_manager.get_review_by_id(review_id, film_id)
     if review is None:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
     return review
@@ -70,14 +163,65 @@ def review_info_handler(film_id: int, review_id: int) -> Any:
     response_model=response_models.Reviews,
     status_code=HTTPStatus.OK,
 )
-def reviews_list_handler(film_id: int, offset: int = 0, limit: int = 10) -> Any:
-    reviews, total = manager.get_reviews(film_id, limit, offset)
+async def reviews_list_handler(
+    request: Request,
+    film_id: int,
+    page: Page = Depends(),
+    output: str = OUTPUT_FORMAT,
+) -> Any:
+    if output == 'ndjson':
+        return ndjson(
+            async_manager.stream_review_rows(film_id),
+            response_models.review_row,
+        )
+
+    async def build() -> Dict[str, Any]:
+        total: Optional[Total] = None
+        if page.cursor is None:
+            reviews, total = await async_manager.get_review_rows(
+                film_id, page.limit, page.offset
+            )
+            next_cursor = None
+        else:
+            try:
+                after = await async_manager.get_review_rows_after(
+                    film_id, page.cursor, page.limit
+                )
+            except ValueError as error:
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST, detail=str(error)
+                ) from error
+            reviews, next_cursor = after
+
+        return {
+            'reviews': [response_models.review_row(x) for x in reviews],
+            **total_fields(total),
+            'offset': None if page.cursor is not None else page.offset,
+            'next_cursor': next_cursor,
+        }
+
+    key = response_cache.film_key(
+        film_id, 'reviews', page.offset, page.limit, page.cursor
+    )
+    return await response_cache.cached_json(request, key, build)
 
-    reviews_models = [response_models.ReviewModel.from_orm(x) for x in reviews]
 
-    return response_models.Reviews(
-        reviews=reviews_models, total=total, offset=offset
-    )
+@router.get(
+    '/{film_id}/page',
+    response_model=response_models.FilmInfoModel,
+    status_code=HTTPStatus.OK,
+)
+async def film_page_handler(
+    request: Request, film_id: int, reviews: int = Query(5, ge=0, le=50)
+) -> Any:
+    async def build() -> Dict[str, Any]:
+        rows = await async_manager.get_film_page(film_id, reviews)
+        if not rows:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        return response_models.film_page(rows)
+
+    key = response_cache.film_key(film_id, 'film_page', reviews)
+    return await response_cache.cached_json(request, key, build)
 
 
 @router.get(
@@ -85,22 +229,26 @@ def reviews_list_handler(film_id: int, offset: int = 0, limit: int = 10) -> Any:
     response_model=response_models.FilmModel,
     status_code=HTTPStatus.OK,
 )
-def film_info_handler(film_id: int) -> Any:
-    result = manager.get_film_by_id(film_id)
-    if result is None:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
-    film, score, evaluators = result
-    model = response_models.FilmModel.from_orm(film)
-    model.score = None if score is None else round(score, 1)
-    model.evaluators = evaluators
-    return model
+async def film_info_handler(request: Request, film_id: int) -> Any:
+    async def build() -> response_models.FilmModel:
+        result = await async_manager.get_film_by_id(film_id)
+        if result is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        film, score, evaluators = result
+        model = response_models.FilmModel.from_orm(film)
+        model.score = None if score is None else round(score, 1)
+        model.evaluators = evaluators
+        return model
+
+    key = response_cache.film_key(film_id, 'info')
+    return await response_cache.cached_json(request, key, build)
 
 
 @router.delete('/{film_id}/reviews/{review_id}', status_code=HTTPStatus.OK)
-def delete_review_handler(
-    review_id: int, user: User = Depends(authorized)
+async def delete_review_handler(
+    review_id: int, user: AuthUser = Depends(authorized)
 ) -> Any:
-    deleted = manager.delete_review(review_id, user)
+    deleted = await async_manager.delete_review(review_id, user)
     if not deleted:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN)
 
@@ -0,0 +1,91 @@
+import logging
+from typing import Iterator, Tuple
+
+from fastapi import APIRouter, Response
+from sqlalchemy.pool import QueuePool
+
+from onlyfilms import auth, get_async_engine, get_engine, response_cache
+from onlyfilms.hashing import hasher
+from onlyfilms.log import BufferedHandler
+from onlyfilms.metrics import CONTENT_TYPE, Gauge, Labels, registry
+
+router = APIRouter()
+
+CACHES = {
+    'response': response_cache.backend.stats,
+    'token': auth.token_cache.stats,
+}
+
+
+def pool_usage() -> Iterator[Tuple[Labels, float]]:
+    pools = {
+        'sync': get_engine().pool,
+        'async': get_async_engine().sync_engine.pool,
+    }
+    for name, pool in pools.items():
+        # in-memory databases share one connection without a queue
+        if isinstance(pool, QueuePool):
+            yield (name, 'checked_out'), pool.checkedout()
+            yield (name, 'idle'), pool.checkedin()
+            yield (name, 'overflow'), max(pool.overflow(), 0)
+            yield (name, 'size'), pool.size()
+
+
+def cache_hit_ratio() -> Iterator[Tuple[Labels, float]]:
+    for name, stats in CACHES.items():
+        # a redis cache keeps no counts
+        counts = stats()
+        lookups = counts.get('hits', 0) + counts.get('misses', 0)
+        if lookups:
+            yield (name,), counts['hits'] / lookups
+
+
+def cache_size() -> Iterator[Tuple[Labels, float]]:
+    for name, stats in CACHES.items():
+        counts = stats()
+        if 'size' in counts:
+            yield (name,), counts['size']
+
+
+def hashing_queue() -> Iterator[Tuple[Labels, float]]:
+    yield (), hasher.depth
+
+
+def dropped_logs() -> Iterator[Tuple[Labels, float]]:
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, BufferedHandler):
+            yield (), handler.dropped
+
+
+registry.register(
+    Gauge(
+        'onlyfilms_db_pool_connections',
+        'Database pool connections by state',
+        ('engine', 'state'),
+        pool_usage,
+    ),
+    Gauge(
+        'onlyfilms_cache_hit_ratio',
+        'Hits of all lookups since start',
+        ('cache',),
+        cache_hit_ratio,
+    ),
+    Gauge('onlyfilms_cache_entries', 'Cached entries', ('cache',), cache_size),
+    Gauge(
+        'onlyfilms_hashing_queue_depth',
+        'Password hashes waiting or running in the bcrypt pool',
+        (),
+        hashing_queue,
+    ),
+    Gauge(
+        'onlyfilms_log_records_dropped',
+        'Log records dropped since start because the log queue was full',
+        (),
+        dropped_logs,
+    ),
+)
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics_handler() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
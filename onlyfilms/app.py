@@ -1,3 +1,52 @@
-from onlyfilms.__main__ import create_app
+from http import HTTPStatus
+from typing import Any
 
-app = create_app()
+from fastapi import Depends, FastAPI
+from fastapi.middleware.wsgi import WSGIMiddleware
+
+from onlyfilms import async_manager, auth, get_async_engine, logger
+from onlyfilms.admin import app as admin_app
+from onlyfilms.api import api
+from onlyfilms.api import metrics as metrics_api
+from onlyfilms.compression import CompressionMiddleware
+from onlyfilms.hashing import HashingOverloaded
+from onlyfilms.metrics import MetricsMiddleware
+from onlyfilms.settings import settings
+from onlyfilms.view import app as interface_app
+
+
+async def dispose_engine() -> None:
+    await get_async_engine().dispose()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(dependencies=[Depends(async_manager.request_session)])
+    app.include_router(api.router)
+    app.include_router(metrics_api.router)
+    app.add_exception_handler(HashingOverloaded, api.hashing_overloaded_handler)
+    sweeper = auth.TokenSweeper(
+        settings.token_purge_interval, settings.token_purge_batch
+    )
+    app.add_event_handler('startup', sweeper.start)
+    app.add_event_handler('shutdown', sweeper.stop)
+    app.add_event_handler('shutdown', dispose_engine)
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.compression_minimum_size
+    )
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
+    app.include_router(interface_app.router)
+    app.add_exception_handler(
+        HTTPStatus.NOT_FOUND, interface_app.not_found_handler
+    )
+    app.mount('/onlyfilms/static', interface_app.static, name='static')
+    app.mount('/onlyfilms/admin', WSGIMiddleware(admin_app.app))
+    logger.info('App was created: %s', app)
+
+    return app
+
+
+# `uvicorn onlyfilms.app:app` builds the app when it is first looked up
+def __getattr__(name: str) -> Any:
+    if name == 'app':
+        return create_app()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,201 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from onlyfilms import (
+    LazySessionMaker,
+    get_async_engine,
+    hashing,
+    logger,
+    manager,
+    metrics,
+)
+
+AsyncSessionCreator = LazySessionMaker(
+    get_async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+STREAM_BATCH = 500
+# perf_counter at every statement under way on a connection
+STATEMENT_STARTS = 'statement_starts'
+
+
+# one session shared by every manager call of a request, opened on first use
+class RequestScope:
+    def __init__(self) -> None:
+        self.session: Optional[AsyncSession] = None
+        self.sessions = 0
+        self.statements = 0
+        self.seconds = 0.0
+
+    def get_session(self) -> AsyncSession:
+        if self.session is None:
+            self.session = AsyncSessionCreator()
+            self.sessions += 1
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class RequestStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.sessions = 0
+        self.statements = 0
+
+    def add(self, scope: RequestScope) -> None:
+        self.requests += 1
+        self.sessions += scope.sessions
+        self.statements += scope.statements
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'sessions': self.sessions,
+            'statements': self.statements,
+        }
+
+
+request_scope: ContextVar[Optional[RequestScope]] = ContextVar(
+    'request_scope', default=None
+)
+request_stats = RequestStats()
+
+
+# a FastAPI dependency of every route
+async def request_session() -> AsyncIterator[RequestScope]:
+    scope = RequestScope()
+    request_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        request_scope.set(None)
+        await scope.close()
+        request_stats.add(scope)
+        metrics.request_statements.observe(scope.statements)
+        metrics.request_db_seconds.observe(scope.seconds)
+        logger.debug(
+            'Request used %d sessions and %d statements',
+            scope.sessions,
+            scope.statements,
+        )
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(connection: Connection, *_: Any) -> None:
+    connection.info.setdefault(STATEMENT_STARTS, []).append(time.perf_counter())
+    scope = request_scope.get()
+    if scope is not None:
+        scope.statements += 1
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_statement(
+    connection: Connection, _: Any, statement: str, *__: Any
+) -> None:
+    seconds = time.perf_counter() - connection.info[STATEMENT_STARTS].pop()
+    scope = request_scope.get()
+    if scope is not None:
+        scope.seconds += seconds
+    metrics.observe_statement(
+        manager.current_function.get(), statement, seconds
+    )
+
+
+@event.listens_for(Engine, 'handle_error')
+def _fail_statement(context: ExceptionContext) -> None:
+    if context.connection is not None:
+        starts = context.connection.info.get(STATEMENT_STARTS)
+        if starts:
+            starts.pop()
+
+
+# runs a sync manager function on an AsyncSession connection via greenlets
+def async_orm_function(
+    func: Callable[..., Any]
+) -> Callable[..., Awaitable[Any]]:
+    @wraps(func)
+    async def wrapper(
+        *args: Any, session: Optional[AsyncSession] = None, **kwargs: Any
+    ) -> Any:
+        def call(sync_session: Session) -> Any:
+            return func(*args, session=sync_session, **kwargs)
+
+        scope = request_scope.get()
+        if session is None and scope is not None:
+            session = scope.get_session()
+        if session is None:
+            async with AsyncSessionCreator() as session:
+                return await session.run_sync(call)
+        return await session.run_sync(call)
+
+    return wrapper
+
+
+def manager_function(name: str) -> Callable[..., Awaitable[Any]]:
+    # looked up on every call so the sync implementation stays patchable
+    def call(*args: Any, session: Session, **kwargs: Any) -> Any:
+        return getattr(manager, name)(*args, session=session, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    return async_orm_function(call)
+
+
+get_film_by_id = manager_function('get_film_by_id')
+get_film_rows = manager_function('get_film_rows')
+get_film_rows_after = manager_function('get_film_rows_after')
+get_review_rows = manager_function('get_review_rows')
+get_review_rows_after = manager_function('get_review_rows_after')
+get_film_page = manager_function('get_film_page')
+get_user_by_login = manager_function('get_user_by_login')
+add_user = manager_function('add_user')
+get_token = manager_function('get_token')
+delete_token = manager_function('delete_token')
+create_token = manager_function('create_token')
+purge_expired_tokens = manager_function('purge_expired_tokens')
+post_review = manager_function('post_review')
+post_reviews = manager_function('post_reviews')
+get_review_by_id = manager_function('get_review_by_id')
+delete_review = manager_function('delete_review')
+login_user = manager_function('login_user')
+
+
+# fetches rows in batches from a server side cursor, the statement is
+# built for the dialect of the session
+async def stream(
+    statement: Callable[[str], Select], batch_size: int = STREAM_BATCH
+) -> AsyncIterator[List[Row]]:
+    scope = request_scope.get()
+    if scope is not None:
+        scope.sessions += 1
+    async with AsyncSessionCreator() as session:
+        result = await session.stream(
+            statement(session.bind.dialect.name).execution_options(
+                yield_per=batch_size
+            )
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+def stream_film_rows(query: str = '') -> AsyncIterator[List[Row]]:
+    return stream(lambda dialect: manager.film_rows_statement(query, dialect))
+
+
+def stream_review_rows(film_id: int) -> AsyncIterator[List[Row]]:
+    return stream(lambda _: manager.review_rows_statement(film_id))
+
+
+async def regster_user(login: str, password: str) -> bool:
+    password_hash = await hashing.hasher.hash_async(password)
+    return await add_user(login, password_hash)
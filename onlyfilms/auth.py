@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+from contextlib import suppress
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from onlyfilms import async_manager, logger, manager, signed_tokens
+from onlyfilms.cache import LRUCache
+from onlyfilms.models.orm import Token
+from onlyfilms.settings import settings
+
+
+class AuthUser(NamedTuple):
+    id: int
+    login: str
+
+
+token_cache: LRUCache[AuthUser] = LRUCache(
+    settings.token_cache_size, settings.token_cache_ttl
+)
+
+
+def remember_token(real_token: Optional[Token]) -> Optional[AuthUser]:
+    if real_token is None:
+        return None
+
+    user = AuthUser(real_token.user.id, real_token.user.login)
+    expires_in = (
+        real_token.created + real_token.EXPIRE - datetime.datetime.now()
+    )
+    token_cache.set(
+        real_token.token,
+        user,
+        min(settings.token_cache_ttl, expires_in.total_seconds()),
+    )
+    return user
+
+
+def verify_signed(token: str) -> Optional[AuthUser]:
+    claims = signed_tokens.signer.verify(token)
+    if claims is None:
+        return None
+    return AuthUser(claims.user_id, claims.login)
+
+
+async def resolve_token_async(token: Optional[str]) -> Optional[AuthUser]:
+    if not token:
+        return None
+    if signed_tokens.is_signed(token):
+        return verify_signed(token)
+
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    return remember_token(await async_manager.get_token(token))
+
+
+def forget_token(token: str) -> None:
+    token_cache.delete(token)
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_deleted_tokens(session: Session) -> None:
+    for token in session.info.pop(manager.DELETED_TOKENS, ()):
+        forget_token(token)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_deleted_tokens(session: Session) -> None:
+    session.info.pop(manager.DELETED_TOKENS, None)
+
+
+async def logout_async(token: Optional[str]) -> bool:
+    if not token:
+        return False
+    if signed_tokens.is_signed(token):
+        return signed_tokens.signer.revoke(token)
+
+    forget_token(token)
+    return await async_manager.delete_token(token)
+
+
+class TokenSweeper:
+    def __init__(self, interval: float, batch_size: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.task: Optional[asyncio.Task[None]] = None
+
+    async def purge(self) -> int:
+        try:
+            purged = await async_manager.purge_expired_tokens(self.batch_size)
+        except SQLAlchemyError:
+            logger.exception('Expired tokens purge failed')
+            return 0
+        if purged:
+            logger.info('Expired tokens purged: %d', purged)
+        return purged
+
+    async def run(self) -> None:
+        while True:
+            await self.purge()
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self.interval > 0 and self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self.task
+        self.task = None
@@ -0,0 +1,160 @@
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class LRUCache(Generic[T]):
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Tuple[float, T]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: T, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheBackend:
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def version(self, name: str) -> int:
+        raise NotImplementedError
+
+    def bump(self, *names: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.cache: LRUCache[Any] = LRUCache(maxsize, ttl)
+        # as many versions as entries are kept, the least recently used
+        # ones are evicted
+        self.maxversions = maxsize
+        self._versions: 'OrderedDict[str, int]' = OrderedDict()
+        # names without a version read the highest evicted one, so a name
+        # never goes back to a version it had before a bump and stale
+        # entries are not revived
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.cache.set(key, value, ttl)
+
+    def version(self, name: str) -> int:
+        with self._lock:
+            version = self._versions.get(name)
+            if version is None:
+                return self._floor
+            self._versions.move_to_end(name)
+            return version
+
+    def bump(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, self._floor) + 1
+                self._versions.move_to_end(name)
+            while len(self._versions) > self.maxversions:
+                _, version = self._versions.popitem(last=False)
+                self._floor = max(self._floor, version)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+class RedisBackend(CacheBackend):
+    def __init__(
+        self, client: Any, ttl: float, prefix: str = 'onlyfilms:'
+    ) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float) -> 'RedisBackend':
+        try:
+            import redis  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise RuntimeError(
+                'Install the redis package to use a redis:// cache'
+            ) from error
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def get(self, key: str) -> Any:
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = math.ceil(self.ttl if ttl is None else ttl)
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=expires)
+
+    def version(self, name: str) -> int:
+        value = self.client.get(f'{self.prefix}version:{name}')
+        return 0 if value is None else int(value)
+
+    def bump(self, *names: str) -> None:
+        pipeline = self.client.pipeline()
+        for name in names:
+            pipeline.incr(f'{self.prefix}version:{name}')
+        pipeline.execute()
+
+
+def create_backend(url: str, maxsize: int, ttl: float) -> CacheBackend:
+    if url.startswith('memory://'):
+        return MemoryBackend(maxsize, ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend.from_url(url, ttl)
+    raise ValueError(f'Unknown cache backend {url}')
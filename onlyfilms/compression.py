@@ -0,0 +1,122 @@
+import zlib
+from typing import Callable, Dict, NamedTuple, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class Compressor(NamedTuple):
+    compress: Callable[[bytes], bytes]
+    finish: Callable[[], bytes]
+
+
+def gzip_compressor() -> Compressor:
+    # wbits 31 writes a gzip header and trailer
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return Compressor(compressor.compress, compressor.flush)
+
+
+def brotli_compressor() -> Compressor:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    return Compressor(compressor.process, compressor.finish)
+
+
+def encodings() -> Dict[str, Callable[[], Compressor]]:
+    if brotli is None:
+        return {'gzip': gzip_compressor}
+    return {'br': brotli_compressor, 'gzip': gzip_compressor}
+
+
+def choose_encoding(accept: str) -> Optional[str]:
+    accepted = {
+        value.split(';')[0].strip().lower() for value in accept.split(',')
+    }
+    for encoding in encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        encoding = None
+        if scope['type'] == 'http':
+            accept = Headers(scope=scope).get('accept-encoding', '')
+            encoding = choose_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, self.minimum_size, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+# compresses whole bodies over minimum_size and every streamed body
+class CompressionResponder:
+    def __init__(self, send: Send, minimum_size: int, encoding: str) -> None:
+        self.next_send = send
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.compressor: Optional[Compressor] = None
+        self.start: Optional[Message] = None
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            # headers are sent with the first body, once its size is known
+            self.start = message
+            return
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not self.should_compress(start, message):
+                await self.next_send(start)
+                await self.next_send(message)
+                return
+            await self.next_send(self.begin(start, message))
+
+        if self.compressor is None:
+            await self.next_send(message)
+            return
+
+        body = self.compressor.compress(message.get('body', b''))
+        if not message.get('more_body', False):
+            body += self.compressor.finish()
+        await self.next_send({**message, 'body': body})
+
+    def should_compress(self, start: Message, message: Message) -> bool:
+        headers = Headers(raw=start['headers'])
+        if 'content-encoding' in headers:
+            return False
+        return message.get('more_body', False) or (
+            len(message.get('body', b'')) >= self.minimum_size
+        )
+
+    def begin(self, start: Message, message: Message) -> Message:
+        self.compressor = encodings()[self.encoding]()
+        headers = MutableHeaders(raw=start['headers'])
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        del headers['Content-Length']
+        if not message.get('more_body', False):
+            # a single body keeps a Content-Length of the compressed size
+            body = message.get('body', b'')
+            compressed = self.compressor.compress(body)
+            compressed += self.compressor.finish()
+            headers['Content-Length'] = str(len(compressed))
+            message['body'] = compressed
+            self.compressor = None
+        return start
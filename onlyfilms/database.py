@@ -0,0 +1,117 @@
+import os
+from typing import TYPE_CHECKING, Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from onlyfilms.settings import Settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver for database {backend}')
+    return str(parsed.set(drivername=ASYNC_DRIVERS[backend]))
+
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == 'sqlite' and parsed.database in (
+        None,
+        '',
+        ':memory:',
+    )
+
+
+def engine_options(
+    url: str, settings: Settings, is_async: bool
+) -> Dict[str, Any]:
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {'connect_args': {}}
+
+    if is_memory_sqlite(url):
+        options['poolclass'] = StaticPool
+    else:
+        options.update(
+            poolclass=AsyncAdaptedQueuePool if is_async else QueuePool,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+            pool_pre_ping=settings.pool_pre_ping,
+        )
+
+    if backend == 'sqlite':
+        options['connect_args']['check_same_thread'] = False
+    elif backend == 'postgresql' and settings.statement_timeout:
+        timeout = str(int(settings.statement_timeout * 1000))
+        if is_async:
+            options['connect_args']['server_settings'] = {
+                'statement_timeout': timeout
+            }
+        else:
+            options['connect_args'][
+                'options'
+            ] = f'-c statement_timeout={timeout}'
+
+    return options
+
+
+def sqlite_pragmas(settings: Settings) -> Dict[str, Any]:
+    return {
+        'journal_mode': settings.sqlite_journal_mode,
+        'synchronous': settings.sqlite_synchronous,
+        'mmap_size': settings.sqlite_mmap_size,
+        'busy_timeout': settings.sqlite_busy_timeout,
+    }
+
+
+def set_sqlite_pragmas(engine: Engine, settings: Settings) -> None:
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def create_db_engine(settings: Settings) -> Engine:
+    url = settings.database_url
+    engine = create_engine(url, **engine_options(url, settings, False))
+    if engine.dialect.name == 'sqlite':
+        set_sqlite_pragmas(engine, settings)
+    return engine
+
+
+def create_async_db_engine(settings: Settings) -> 'AsyncEngine':
+    # only the server and its tests need the asyncio extension
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = settings.async_database_url or async_url(settings.database_url)
+    engine = create_async_engine(url, **engine_options(url, settings, True))
+    if engine.sync_engine.dialect.name == 'sqlite':
+        set_sqlite_pragmas(engine.sync_engine, settings)
+    return engine
+
+
+# a forked worker opens its own connections instead of sharing the parent's
+def dispose_after_fork(*engines: Engine) -> None:
+    def dispose() -> None:
+        for engine in engines:
+            engine.dispose(close=False)
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=dispose)
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import bcrypt
+
+from onlyfilms.settings import settings
+
+T = TypeVar('T')
+
+
+class HashingOverloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__('Too many password hashing requests')
+        self.retry_after = retry_after
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> bytes:
+    salt = bcrypt.gensalt(settings.bcrypt_rounds if rounds is None else rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt)
+
+
+def check_password(password: str, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash)
+
+
+# bcrypt releases the GIL, so a thread pool hashes in parallel
+class PasswordHasher:
+    def __init__(
+        self, workers: int, queue_limit: int, retry_after: int
+    ) -> None:
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.retry_after = retry_after
+        self.depth = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def hash(self, password: str) -> bytes:
+        return self._run(hash_password, password)
+
+    def check(self, password: str, password_hash: bytes) -> bool:
+        return self._run(check_password, password, password_hash)
+
+    async def hash_async(self, password: str) -> bytes:
+        return await self._run_async(hash_password, password)
+
+    async def check_async(self, password: str, password_hash: bytes) -> bool:
+        return await self._run_async(check_password, password, password_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if not self.workers:
+            return func(*args)
+        return self._submit(func, *args).result()
+
+    async def _run_async(self, func: Callable[..., T], *args: Any) -> T:
+        if not self.workers:
+            # without a pool the loop's default executor keeps bcrypt off
+            # the event loop
+            return await asyncio.to_thread(func, *args)
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def _submit(self, func: Callable[..., T], *args: Any) -> 'Future[T]':
+        with self._lock:
+            if self.depth >= self.queue_limit:
+                raise HashingOverloaded(self.retry_after)
+            self.depth += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='bcrypt'
+                )
+            executor = self._executor
+
+        future = executor.submit(func, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _: Any = None) -> None:
+        with self._lock:
+            self.depth -= 1
+
+
+hasher = PasswordHasher(
+    settings.hash_workers, settings.hash_queue_limit, settings.hash_retry_after
+)
@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+from http import HTTPStatus
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, ValidationError
+
+from onlyfilms import logger, manager
+from onlyfilms.manager import NewReview
+from onlyfilms.models.request_models import FilmRecord, ReviewRecord
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+Line = Tuple[int, Union[BaseModel, str]]
+# loads valid records of a batch, returns inserted, updated, rejected
+Loader = Callable[[List[Any]], Tuple[int, int, int]]
+
+
+class ImportResult(NamedTuple):
+    inserted: int
+    updated: int
+    invalid: int
+    resumed_from: int
+
+
+class ImportOptions(NamedTuple):
+    batch_size: int = 1000
+    resume: bool = True
+    # csv or jsonl, None guesses it from the file suffix
+    file_format: Optional[str] = None
+
+
+def detect_format(path: Path, file_format: Optional[str] = None) -> str:
+    if file_format is None:
+        file_format = FORMATS.get(path.suffix.lower())
+    if file_format is None or file_format not in FORMATS.values():
+        raise ValueError(f'Unknown format of {path}, use csv or jsonl')
+    return file_format
+
+
+def read_rows(path: Path, file_format: str) -> Iterator[Tuple[int, Any]]:
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    yield number, line
+
+
+def read_records(
+    path: Path, file_format: str, model: Type[BaseModel], start: int = 0
+) -> Iterator[Line]:
+    for number, row in read_rows(path, file_format):
+        if number <= start:
+            continue
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            yield number, model.parse_obj(row)
+        except (ValueError, ValidationError) as error:
+            yield number, str(error).replace('\n', ' ')
+
+
+def batched(lines: Iterator[Line], size: int) -> Iterator[List[Line]]:
+    while True:
+        batch = list(islice(lines, size))
+        if not batch:
+            return
+        yield batch
+
+
+def progress_path(path: Path) -> Path:
+    return path.with_name(path.name + '.progress')
+
+
+def read_progress(path: Path) -> int:
+    try:
+        return int(path.read_text())
+    except (OSError, ValueError):
+        return 0
+
+
+def write_progress(path: Path, line: int) -> None:
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_text(str(line))
+    os.replace(temporary, path)
+
+
+def import_file(
+    path: Path,
+    model: Type[BaseModel],
+    load: Loader,
+    options: ImportOptions = ImportOptions(),
+) -> ImportResult:
+    file_format = detect_format(path, options.file_format)
+    progress = progress_path(path)
+    start = read_progress(progress) if options.resume else 0
+    if start:
+        logger.info('Resuming import of %s after line %d', path, start)
+
+    inserted = updated = invalid = 0
+    lines = read_records(path, file_format, model, start)
+    for batch in batched(lines, options.batch_size):
+        records = []
+        for number, record in batch:
+            if isinstance(record, str):
+                logger.warning(
+                    'Line %d of %s skipped: %s', number, path, record
+                )
+                invalid += 1
+            else:
+                records.append(record)
+
+        if records:
+            added, changed, rejected = load(records)
+            inserted += added
+            updated += changed
+            invalid += rejected
+        # the batch is committed, a rerun continues after it
+        write_progress(progress, batch[-1][0])
+        logger.info('Imported %s up to line %d', path, batch[-1][0])
+
+    if progress.exists():
+        progress.unlink()
+    return ImportResult(inserted, updated, invalid, start)
+
+
+def import_films(
+    path: Path,
+    batch_size: int = 1000,
+    upsert: bool = True,
+    resume: bool = True,
+    file_format: Optional[str] = None,
+) -> ImportResult:
+    def load(records: List[FilmRecord]) -> Tuple[int, int, int]:
+        return manager.import_films(records, upsert=upsert)
+
+    return import_file(
+        path,
+        FilmRecord,
+        load,
+        ImportOptions(batch_size, resume, file_format),
+    )
+
+
+def load_reviews(records: List[ReviewRecord]) -> Tuple[int, int, int]:
+    authors = manager.get_user_ids({record.author for record in records})
+    external_ids = {
+        record.film_external_id for record in records if record.film_id is None
+    }
+    films = manager.get_film_ids(external_ids) if external_ids else {}
+
+    reviews = []
+    for record in records:
+        author_id = authors.get(record.author)
+        film_id = record.film_id
+        if film_id is None:
+            film_id = films.get(record.film_external_id)
+        if author_id is None or film_id is None:
+            logger.warning(
+                'Review of %s by %s skipped: unknown author or film',
+                record.film_id or record.film_external_id,
+                record.author,
+            )
+            continue
+        reviews.append(
+            NewReview(
+                author_id, film_id, record.text, record.score, record.created
+            )
+        )
+
+    statuses = manager.post_reviews(reviews) if reviews else []
+    created = 0
+    for review, (status, _) in zip(reviews, statuses):
+        if status == HTTPStatus.CREATED:
+            created += 1
+        else:
+            logger.warning(
+                'Review of %d by author %d rejected: %s',
+                review.film_id,
+                review.author_id,
+                status.phrase,
+            )
+    return created, 0, len(records) - created
+
+
+def import_reviews(
+    path: Path,
+    batch_size: int = 1000,
+    resume: bool = True,
+    file_format: Optional[str] = None,
+) -> ImportResult:
+    return import_file(
+        path,
+        ReviewRecord,
+        load_reviews,
+        ImportOptions(batch_size, resume, file_format),
+    )
@@ -0,0 +1,178 @@
+import copy
+import datetime
+import logging
+import os
+import queue
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, Dict, Optional, Tuple
+
+import orjson
+
+from onlyfilms.settings import settings
+
+# attributes of every LogRecord, anything else came in through extra=
+RECORD_FIELDS = {
+    *vars(logging.LogRecord('', 0, '', 0, '', (), None)),
+    'message',
+    'asctime',
+    # uvicorn repeats its messages with terminal colors
+    'color_message',
+}
+
+
+def truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str) and limit and len(value) > limit:
+        return f'{value[:limit]}... ({len(value)} chars)'
+    return value
+
+
+def parse_sampling(sampling: str) -> Dict[str, int]:
+    rates = {}
+    for item in filter(None, (x.strip() for x in sampling.split(','))):
+        name, _, every = item.rpartition(':')
+        if not name or not every.isdigit() or int(every) < 1:
+            raise ValueError('Log sampling must look like logger:N')
+        rates[name] = int(every)
+    return rates
+
+
+# keeps one of every N info lines of each message, warnings always pass
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: Dict[str, int]) -> None:
+        super().__init__()
+        self.rates = rates
+        self.seen: Dict[Tuple[str, Any], int] = {}
+
+    def rate(self, name: str) -> int:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return self.rates.get('root', 1)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        every = self.rate(record.name)
+        if every == 1:
+            return True
+        key = (record.name, record.msg)
+        seen = self.seen.get(key, 0)
+        self.seen[key] = seen + 1
+        return seen % every == 0
+
+
+class Listener(QueueListener):
+    def __init__(
+        self, records: 'queue.Queue[Any]', handler: logging.Handler
+    ) -> None:
+        super().__init__(records, handler)
+        self.records = records
+
+    # the records of a full queue are written before the listener stops;
+    # QueueListener stops at None, its sentinel, but only offers put_nowait
+    def enqueue_sentinel(self) -> None:
+        self.records.put(None)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created).isoformat(
+                timespec='milliseconds'
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_FIELDS:
+                entry[key] = truncate(value, settings.log_field_limit)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return orjson.dumps(entry, default=str).decode('utf-8')
+
+
+forked_handlers: 'weakref.WeakSet[BufferedHandler]' = weakref.WeakSet()
+
+
+# the calling thread only fills in the message, a listener thread formats
+# and writes it; a full queue drops records instead of blocking requests
+class BufferedHandler(QueueHandler):
+    def __init__(
+        self,
+        stream: IO[str],
+        capacity: Optional[int] = None,
+        sampling: Optional[str] = None,
+    ) -> None:
+        self.records: 'queue.Queue[Any]' = queue.Queue(
+            settings.log_queue_size if capacity is None else capacity
+        )
+        super().__init__(self.records)
+        self.dropped = 0
+        self.closed = False
+        self.writer = logging.StreamHandler(stream)
+        # started by the first record, so a forked worker starts its own
+        self.listener: Optional[Listener] = None
+        forked_handlers.add(self)
+        rates = parse_sampling(
+            settings.log_sampling if sampling is None else sampling
+        )
+        if rates:
+            self.addFilter(SamplingFilter(rates))
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        self.writer.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        limit = settings.log_field_limit
+        # long review bodies are cut before they are copied into the message
+        if isinstance(record.args, tuple):
+            record.args = tuple(truncate(arg, limit) for arg in record.args)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.listener is None and not self.closed:
+            self.listener = Listener(self.records, self.writer)
+            self.listener.start()
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # the thread of the parent does not exist in a forked child, and its
+    # queue may have been locked by it
+    def after_fork(self) -> None:
+        self.records = self.queue = queue.Queue(self.records.maxsize)
+        self.listener = None
+
+    def close(self) -> None:
+        self.closed = True
+        # waits for the queued records to be written
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.writer.close()
+        super().close()
+
+
+def reset_after_fork() -> None:
+    for handler in list(forked_handlers):
+        handler.after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
@@ -0,0 +1,79 @@
+from onlyfilms.manager.base import (
+    FILM_ROW,
+    FILM_SCORE,
+    REVIEW_ROW,
+    NewReview,
+    Total,
+    current_function,
+    orm_function,
+)
+from onlyfilms.manager.catalog import (
+    get_film_ids,
+    import_films,
+    rebuild_film_aggregates,
+)
+from onlyfilms.manager.films import (
+    film_rows_statement,
+    get_film_by_id,
+    get_film_page,
+    get_film_rows,
+    get_film_rows_after,
+    rebuild_search_index,
+)
+from onlyfilms.manager.reviews import (
+    delete_review,
+    get_review_by_id,
+    get_review_rows,
+    get_review_rows_after,
+    post_review,
+    post_reviews,
+    review_rows_statement,
+)
+from onlyfilms.manager.users import (
+    DELETED_TOKENS,
+    add_user,
+    create_token,
+    delete_token,
+    get_token,
+    get_user_by_login,
+    get_user_ids,
+    login_user,
+    purge_expired_tokens,
+    regster_user,
+)
+
+__all__ = [
+    'DELETED_TOKENS',
+    'FILM_ROW',
+    'FILM_SCORE',
+    'REVIEW_ROW',
+    'NewReview',
+    'Total',
+    'add_user',
+    'create_token',
+    'current_function',
+    'delete_review',
+    'delete_token',
+    'film_rows_statement',
+    'get_film_by_id',
+    'get_film_ids',
+    'get_film_page',
+    'get_film_rows',
+    'get_film_rows_after',
+    'get_review_by_id',
+    'get_review_rows',
+    'get_review_rows_after',
+    'get_token',
+    'get_user_by_login',
+    'get_user_ids',
+    'import_films',
+    'login_user',
+    'orm_function',
+    'post_review',
+    'post_reviews',
+    'purge_expired_tokens',
+    'rebuild_film_aggregates',
+    'rebuild_search_index',
+    'regster_user',
+    'review_rows_statement',
+]
@@ -0,0 +1,86 @@
+import datetime
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Float, case, cast, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+
+from onlyfilms import Session as SessionCreator
+from onlyfilms.models.orm import Film, Review, User
+
+FILM_SCORE = case(
+    (Film.score_count > 0, cast(Film.score_sum, Float) / Film.score_count),
+    else_=None,
+)
+
+
+# plain columns of listings, encoded without building pydantic models
+FILM_ROW = (
+    Film.id,
+    Film.title,
+    Film.director,
+    Film.description,
+    Film.cover,
+    FILM_SCORE.label('score'),
+    Film.review_count.label('evaluators'),
+)
+REVIEW_ROW = (
+    Review.id,
+    Review.film_id,
+    Review.created,
+    Review.text,
+    Review.score,
+    User.id.label('author_id'),
+    User.login.label('author_login'),
+)
+
+
+class Total(NamedTuple):
+    value: int
+    # False when a search matched more films than it counts
+    exact: bool = True
+
+
+class NewReview(NamedTuple):
+    author_id: int
+    film_id: int
+    text: Optional[str]
+    score: Optional[int] = None
+    created: Optional[datetime.datetime] = None
+
+
+# the innermost manager function running, to attribute SQL statements
+current_function: ContextVar[str] = ContextVar('current_function', default='')
+
+
+def orm_function(func: Callable[..., Any]):  # type: ignore
+    @wraps(func)
+    def wrapper(*args, **kwargs):  # type: ignore
+        running = current_function.set(wrapper.__name__)
+        try:
+            if kwargs.get('session') is None:
+                with SessionCreator() as session:
+                    return func(*args, session=session, **kwargs)
+            else:
+                return func(*args, **kwargs)
+        finally:
+            current_function.reset(running)
+
+    return wrapper
+
+
+def paginate(
+    query: Query, total: Any, offset: int, limit: int, session: Session
+) -> Tuple[List[Row], int]:
+    # the total comes as the last column of every row of the page
+    rows = (
+        query.add_columns(total.label('total'))
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return rows, rows[-1].total or 0
+    return rows, session.scalar(select(total)) or 0
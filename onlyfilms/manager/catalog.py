@@ -0,0 +1,139 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import func as sql_func
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from onlyfilms import logger, response_cache
+from onlyfilms.manager.base import orm_function
+from onlyfilms.models.orm import Film, Review
+from onlyfilms.models.request_models import FilmRecord
+
+AGGREGATES_CHUNK = 500
+
+
+@orm_function
+def rebuild_film_aggregates(
+    verify_only: bool = False, session: Session = None
+) -> int:
+    review_count = (
+        select(sql_func.count(Review.id))
+        .where(Review.film_id == Film.id)
+        .scalar_subquery()
+    )
+    score_count = (
+        select(sql_func.count(Review.score))
+        .where(Review.film_id == Film.id)
+        .scalar_subquery()
+    )
+    score_sum = (
+        select(sql_func.coalesce(sql_func.sum(Review.score), 0))
+        .where(Review.film_id == Film.id)
+        .scalar_subquery()
+    )
+
+    mismatched = [
+        film_id
+        for (film_id,) in session.query(Film.id).filter(
+            or_(
+                Film.review_count != review_count,
+                Film.score_count != score_count,
+                Film.score_sum != score_sum,
+            )
+        )
+    ]
+
+    if mismatched and not verify_only:
+        for start in range(0, len(mismatched), AGGREGATES_CHUNK):
+            chunk = mismatched[start : start + AGGREGATES_CHUNK]
+            session.query(Film).filter(Film.id.in_(chunk)).update(
+                {
+                    Film.review_count: review_count,
+                    Film.score_count: score_count,
+                    Film.score_sum: score_sum,
+                },
+                synchronize_session=False,
+            )
+        session.commit()
+        # bulk updates bypass the session events
+        response_cache.invalidate_films(mismatched)
+
+    return len(mismatched)
+
+
+@orm_function
+def get_film_ids(
+    external_ids: Iterable[str], session: Session = None
+) -> Dict[str, int]:
+    return dict(
+        session.query(Film.external_id, Film.id).filter(
+            Film.external_id.in_(list(external_ids))
+        )
+    )
+
+
+def _import_rows(
+    new_films: List[Dict[str, Any]],
+    updated_films: List[Dict[str, Any]],
+    session: Session,
+) -> Tuple[int, int, int]:
+    counts = {True: 0, False: 0}
+    rejected = 0
+    rows = [(x, False) for x in new_films] + [(x, True) for x in updated_films]
+    for row, update in rows:
+        try:
+            if update:
+                session.bulk_update_mappings(Film, [row])
+            else:
+                session.bulk_insert_mappings(Film, [row])
+            session.commit()
+        except IntegrityError as error:
+            session.rollback()
+            logger.warning(
+                'Film %s rejected: %s', row.get('external_id'), error.orig
+            )
+            rejected += 1
+        else:
+            counts[update] += 1
+    return counts[False], counts[True], rejected
+
+
+@orm_function
+def import_films(
+    records: List[FilmRecord], upsert: bool = True, session: Session = None
+) -> Tuple[int, int, int]:
+    new_films = []
+    known: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        if upsert and record.external_id is not None:
+            # later rows of a duplicated external id override earlier ones,
+            # fields missing from a row are left as they are
+            row = known.setdefault(record.external_id, {})
+            row.update(record.dict(exclude_unset=True))
+        else:
+            new_films.append(record.dict())
+
+    updated_films = []
+    if known:
+        existing = get_film_ids(known, session=session)
+        for external_id, row in known.items():
+            if external_id in existing:
+                updated_films.append({'id': existing[external_id], **row})
+            else:
+                new_films.append(row)
+
+    result = len(new_films), len(updated_films), 0
+    try:
+        session.bulk_insert_mappings(Film, new_films)
+        session.bulk_update_mappings(Film, updated_films)
+        session.commit()
+    except IntegrityError:
+        # a duplicated external id fails the whole batch, retry row by row
+        session.rollback()
+        result = _import_rows(new_films, updated_films, session)
+    # bulk operations bypass the session events, and a version per updated
+    # film would pile up in the memory backend
+    response_cache.invalidate_all()
+
+    return result
@@ -0,0 +1,147 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy import func as sql_func
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from onlyfilms import search
+from onlyfilms.manager.base import (
+    FILM_ROW,
+    FILM_SCORE,
+    Total,
+    orm_function,
+    paginate,
+)
+from onlyfilms.models.orm import Film, Review, User
+from onlyfilms.pagination import decode_cursor, encode_cursor
+from onlyfilms.settings import settings
+
+
+@orm_function
+def get_film_by_id(
+    film_id: int, session: Session = None
+) -> Tuple[Film, float, int]:
+    data = (
+        session.query(Film, FILM_SCORE, Film.review_count)
+        .filter(Film.id == film_id)
+        .first()
+    )
+
+    return data
+
+
+@orm_function
+def get_film_rows(
+    query: str = '',
+    offset: int = 0,
+    limit: int = 10,
+    session: Session = None,
+) -> Tuple[List[Row], Total]:
+    films_query = session.query(*FILM_ROW)
+    if not query:
+        total = select(sql_func.count(Film.id)).scalar_subquery()
+        films, count = paginate(
+            films_query.order_by(Film.id), total, offset, limit, session
+        )
+        return films, Total(count)
+
+    backend = search.get_backend(session.get_bind().dialect.name)
+    matches = backend.filter(select(Film.id), query)
+    cap = settings.search_total_limit
+    if cap > 0:
+        matches = matches.limit(cap + 1)
+    total = select(sql_func.count()).select_from(matches.subquery())
+    films_query = backend.rank(films_query, query, offset + limit)
+    films, count = paginate(
+        films_query.order_by(Film.id),
+        total.scalar_subquery(),
+        offset,
+        limit,
+        session,
+    )
+    if 0 < cap < count:
+        return films, Total(cap, exact=False)
+    return films, Total(count)
+
+
+@orm_function
+def get_film_rows_after(
+    query: str = '',
+    cursor: str = '',
+    limit: int = 10,
+    session: Session = None,
+) -> Tuple[List[Row], Optional[str]]:
+    films_query = session.query(*FILM_ROW)
+    if query:
+        backend = search.get_backend(session.get_bind().dialect.name)
+        films_query = backend.filter(films_query, query)
+
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        films_query = films_query.filter(Film.id > last_id)
+
+    # keyset pages follow Film.id, so matches of a query come in id order
+    # instead of the search rank used by offset pagination
+    films = films_query.order_by(Film.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(films) > limit:
+        films = films[:limit]
+        next_cursor = encode_cursor(films[-1].id)
+
+    return films, next_cursor
+
+
+@orm_function
+def rebuild_search_index(session: Session = None) -> None:
+    search.rebuild_index(session.connection())
+    session.commit()
+
+
+def film_rows_statement(query: str, dialect: str) -> Select:
+    statement = select(*FILM_ROW)
+    if query:
+        statement = search.get_backend(dialect).filter(statement, query)
+    return statement.order_by(Film.id)
+
+
+def film_page_statement() -> Select:
+    first_reviews = (
+        select(Review)
+        .where(Review.film_id == bindparam('film_id'))
+        .order_by(Review.created, Review.id)
+        .limit(bindparam('reviews'))
+        .subquery()
+    )
+    # one row per review, or a single row with empty reviews columns
+    return (
+        select(
+            *FILM_ROW,
+            first_reviews.c.id.label('review_id'),
+            first_reviews.c.created.label('review_created'),
+            first_reviews.c.text.label('review_text'),
+            first_reviews.c.score.label('review_score'),
+            User.id.label('author_id'),
+            User.login.label('author_login'),
+        )
+        .select_from(Film)
+        .outerjoin(first_reviews, first_reviews.c.film_id == Film.id)
+        .outerjoin(User, User.id == first_reviews.c.author_id)
+        .where(Film.id == bindparam('film_id'))
+        .order_by(first_reviews.c.created, first_reviews.c.id)
+    )
+
+
+FILM_PAGE = film_page_statement()
+
+
+@orm_function
+def get_film_page(
+    film_id: int, reviews: int = 5, session: Session = None
+) -> List[Row]:
+    return session.execute(
+        FILM_PAGE, {'film_id': film_id, 'reviews': reviews}
+    ).all()
@@ -0,0 +1,191 @@
+import datetime
+from http import HTTPStatus
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query, Session, joinedload
+from sqlalchemy.sql import Select
+
+from onlyfilms.manager.base import (
+    REVIEW_ROW,
+    NewReview,
+    Total,
+    orm_function,
+    paginate,
+)
+from onlyfilms.models import response_models
+from onlyfilms.models.orm import Film, Review, User
+from onlyfilms.pagination import decode_cursor, encode_cursor
+
+if TYPE_CHECKING:
+    from onlyfilms.auth import AuthUser
+
+
+def review_rows_statement(film_id: int) -> Select:
+    return (
+        select(*REVIEW_ROW)
+        .outerjoin(User, User.id == Review.author_id)
+        .where(Review.film_id == film_id)
+        .order_by(Review.created, Review.id)
+    )
+
+
+def _review_rows(session: Session, film_id: int) -> Query:
+    return (
+        session.query(*REVIEW_ROW)
+        .outerjoin(User, User.id == Review.author_id)
+        .filter(Review.film_id == film_id)
+    )
+
+
+@orm_function
+def get_review_rows(
+    film_id: int, limit: int = 3, offset: int = 0, session: Session = None
+) -> Tuple[List[Row], Total]:
+    total = select(Film.review_count).where(Film.id == film_id)
+    reviews, count = paginate(
+        _review_rows(session, film_id).order_by(Review.created, Review.id),
+        total.scalar_subquery(),
+        offset,
+        limit,
+        session,
+    )
+    return reviews, Total(count)
+
+
+@orm_function
+def get_review_rows_after(
+    film_id: int, cursor: str = '', limit: int = 3, session: Session = None
+) -> Tuple[List[Row], Optional[str]]:
+    reviews_query = _review_rows(session, film_id)
+    if cursor:
+        created, last_id = decode_cursor(cursor, str, int)
+        try:
+            last_created = datetime.datetime.fromisoformat(created)
+        except ValueError as error:
+            raise ValueError(f'Invalid cursor {cursor!r}') from error
+        reviews_query = reviews_query.filter(
+            tuple_(Review.created, Review.id) > (last_created, last_id)
+        )
+
+    reviews = (
+        reviews_query.order_by(Review.created, Review.id).limit(limit + 1).all()
+    )
+
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        last = reviews[-1]
+        next_cursor = encode_cursor(last.created.isoformat(), last.id)
+
+    return reviews, next_cursor
+
+
+@orm_function
+def post_review(
+    film_id: int,
+    author: Union[User, 'AuthUser'],
+    text: str,
+    score: Optional[int] = None,
+    session: Session = None,
+) -> Tuple[HTTPStatus, Optional[int]]:
+    film = session.query(Film).filter(Film.id == film_id).first()
+    if film is None:
+        return HTTPStatus.NOT_FOUND, None
+
+    new_review = Review(None, film, text, score)
+    new_review.author_id = author.id
+
+    session.add(new_review)
+    try:
+        session.commit()
+        return HTTPStatus.CREATED, new_review.id
+    except SQLAlchemyError:
+        session.rollback()
+    return HTTPStatus.BAD_REQUEST, None
+
+
+@orm_function
+def post_reviews(
+    reviews: List[NewReview], session: Session = None
+) -> List[Tuple[HTTPStatus, Optional[int]]]:
+    film_ids = {review.film_id for review in reviews}
+    author_ids = {review.author_id for review in reviews}
+    known_films = {
+        film_id
+        for (film_id,) in session.query(Film.id).filter(Film.id.in_(film_ids))
+    }
+    # pairs already taken by _user_review_unique
+    reviewed = set(
+        session.query(Review.author_id, Review.film_id).filter(
+            Review.author_id.in_(author_ids), Review.film_id.in_(known_films)
+        )
+    )
+
+    statuses: List[Tuple[HTTPStatus, Optional[int]]] = []
+    created = []
+    for review in reviews:
+        if review.film_id not in known_films:
+            statuses.append((HTTPStatus.NOT_FOUND, None))
+            continue
+        if (review.author_id, review.film_id) in reviewed:
+            statuses.append((HTTPStatus.CONFLICT, None))
+            continue
+
+        reviewed.add((review.author_id, review.film_id))
+        new_review = Review(None, None, review.text, review.score)
+        new_review.author_id = review.author_id
+        new_review.film_id = review.film_id
+        if review.created is not None:
+            new_review.created = review.created
+        created.append((len(statuses), new_review))
+        statuses.append((HTTPStatus.CREATED, None))
+
+    session.add_all([new_review for _, new_review in created])
+    try:
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        for index, _ in created:
+            statuses[index] = (HTTPStatus.BAD_REQUEST, None)
+        return statuses
+
+    for index, new_review in created:
+        statuses[index] = (HTTPStatus.CREATED, new_review.id)
+    return statuses
+
+
+@orm_function
+def get_review_by_id(
+    review_id: int, film_id: int, session: Session = None
+) -> Optional[response_models.ReviewModel]:
+    review = (
+        session.query(Review)
+        .filter((Review.id == review_id) & (Review.film_id == film_id))
+        .first()
+    )
+    if review is None:
+        return None
+    return response_models.ReviewModel.from_orm(review)
+
+
+@orm_function
+def delete_review(
+    review_id: int, user: Union[User, 'AuthUser'], session: Session = None
+) -> Optional[int]:
+    review: Review = (
+        session.query(Review)
+        .filter(Review.id == review_id)
+        .options(joinedload(Review.author))
+        .first()
+    )
+    if review and review.author.id == user.id:
+        try:
+            session.delete(review)
+            session.commit()
+        except SQLAlchemyError:
+            return None
+        return review.id
+    return None
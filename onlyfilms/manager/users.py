@@ -0,0 +1,147 @@
+import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.util import await_only
+
+from onlyfilms import hashing, signed_tokens
+from onlyfilms.manager.base import orm_function
+from onlyfilms.models.orm import Token, User
+from onlyfilms.settings import settings
+
+# session.info key of the tokens deleted in the current transaction
+DELETED_TOKENS = 'deleted_tokens'
+
+
+@orm_function
+def get_user_by_login(login: str, session: Session = None) -> Optional[User]:
+    return session.query(User).filter(User.login == login).first()
+
+
+@orm_function
+def regster_user(login: str, password: str, session: Session = None) -> bool:
+    return add_user(login, hashing.hasher.hash(password), session=session)
+
+
+@orm_function
+def add_user(login: str, password_hash: bytes, session: Session = None) -> bool:
+    new_user = User(login, password_hash=password_hash)
+    session.add(new_user)
+
+    try:
+        session.commit()
+        session.expunge(new_user)
+    except SQLAlchemyError:
+        session.rollback()
+        return False
+    return True
+
+
+@orm_function
+def get_user_ids(
+    logins: Iterable[str], session: Session = None
+) -> Dict[str, int]:
+    return dict(
+        session.query(User.login, User.id).filter(User.login.in_(list(logins)))
+    )
+
+
+def _trim_tokens(user_id: int, keep: int, session: Session) -> None:
+    stale = session.execute(
+        select(Token.id, Token.token)
+        .where(Token.user_id == user_id)
+        .order_by(Token.created.desc(), Token.id.desc())
+        .offset(keep)
+    ).all()
+    if not stale:
+        return
+    session.query(Token).filter(Token.id.in_([x.id for x in stale])).delete(
+        synchronize_session=False
+    )
+    # a cached token would authenticate until its ttl runs out, auth drops
+    # these from its cache after the commit
+    session.info.setdefault(DELETED_TOKENS, set()).update(
+        row.token for row in stale
+    )
+
+
+@orm_function
+def create_token(user: User, session: Session = None) -> Optional[str]:
+    if settings.token_max_per_user > 0:
+        _trim_tokens(user.id, settings.token_max_per_user - 1, session)
+
+    new_token = Token(user)
+    token = new_token.token
+    session.add(new_token)
+
+    try:
+        session.commit()
+        return token
+    except SQLAlchemyError:
+        session.rollback()
+    return None
+
+
+def _check_password(
+    password: str, password_hash: bytes, session: Session
+) -> bool:
+    # the async manager runs this in a greenlet on the event loop, awaiting
+    # the hashing pool there keeps the loop serving while bcrypt runs
+    if session.get_bind().dialect.is_async:
+        return await_only(hashing.hasher.check_async(password, password_hash))
+    return hashing.hasher.check(password, password_hash)
+
+
+@orm_function
+def login_user(
+    login: str, password: str, session: Session = None
+) -> Optional[str]:
+    user = get_user_by_login(login, session=session)
+
+    if user and _check_password(password, user.password, session):
+        if settings.token_backend == 'signed':
+            return signed_tokens.signer.issue(user.id, user.login)
+        return create_token(user, session=session)
+    return None
+
+
+@orm_function
+def get_token(token: str, session: Session = None) -> Optional[Token]:
+    return (
+        session.query(Token)
+        .options(joinedload(Token.user))
+        .filter(
+            Token.token == token,
+            Token.created > datetime.datetime.now() - Token.EXPIRE,
+        )
+        .first()
+    )
+
+
+@orm_function
+def delete_token(token: str, session: Session = None) -> bool:
+    deleted = session.query(Token).filter(Token.token == token).delete()
+    session.commit()
+    return deleted > 0
+
+
+@orm_function
+def purge_expired_tokens(
+    batch_size: int = 1000, session: Session = None
+) -> int:
+    expired = select(Token.id).where(
+        Token.created <= datetime.datetime.now() - Token.EXPIRE
+    )
+    purged = 0
+    while True:
+        ids = session.execute(expired.limit(batch_size)).scalars().all()
+        if ids:
+            session.query(Token).filter(Token.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            session.commit()
+            purged += len(ids)
+        if len(ids) < batch_size:
+            return purged
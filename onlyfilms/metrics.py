@@ -0,0 +1,250 @@
+import bisect
+import math
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from onlyfilms import logger
+from onlyfilms.settings import settings
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENTS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED = '<unmatched>'
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(
+        self, name: str, description: str, labels: Labels = ()
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self.values.items())
+        for labels, value in values:
+            yield self.name, dict(zip(self.labels, labels)), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Labels = (),
+        buckets: Sequence[float] = SECONDS,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = [*buckets, math.inf]
+        # per label values: a count per bucket, then the sum
+        self.values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0.0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [(x, list(counts)) for x, counts in self.values.items()]
+        for labels, counts in values:
+            names = dict(zip(self.labels, labels))
+            total = 0.0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                bucket = {**names, 'le': format_value(bound)}
+                yield f'{self.name}_bucket', bucket, total
+            yield f'{self.name}_sum', names, counts[-1]
+            yield f'{self.name}_count', names, total
+
+
+# read on every scrape from objects that keep their own numbers
+class Gauge:
+    type = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Labels,
+        collect: Callable[[], Iterable[Tuple[Labels, float]]],
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self.collect():
+            yield self.name, dict(zip(self.labels, labels)), value
+
+
+Metric = Union[Counter, Histogram, Gauge]
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{key}="{escape(value)}"' for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, *metrics: Metric) -> None:
+        for metric in metrics:
+            self.metrics[metric.name] = metric
+
+    # the Prometheus text format
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.description}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(
+                    f'{name}{format_labels(labels)} {format_value(value)}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_duration = Histogram(
+    'onlyfilms_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status'),
+)
+request_statements = Histogram(
+    'onlyfilms_request_db_statements',
+    'SQL statements per HTTP request',
+    buckets=STATEMENTS,
+)
+request_db_seconds = Histogram(
+    'onlyfilms_request_db_seconds', 'Time spent in SQL per HTTP request'
+)
+statements = Counter(
+    'onlyfilms_db_statements_total',
+    'SQL statements by manager function',
+    ('function',),
+)
+statement_seconds = Counter(
+    'onlyfilms_db_statement_seconds_total',
+    'Time spent in SQL by manager function',
+    ('function',),
+)
+slow_statements = Counter(
+    'onlyfilms_db_slow_statements_total',
+    'SQL statements slower than slow_query_threshold by manager function',
+    ('function',),
+)
+registry.register(
+    request_duration,
+    request_statements,
+    request_db_seconds,
+    statements,
+    statement_seconds,
+    slow_statements,
+)
+
+
+def observe_statement(function: str, statement: str, seconds: float) -> None:
+    function = function or 'other'
+    statements.inc(function)
+    statement_seconds.inc(function, amount=seconds)
+    threshold = settings.slow_query_threshold
+    if threshold and seconds >= threshold:
+        slow_statements.inc(function)
+        logger.warning(
+            'Slow query in %s took %.3fs: %s', function, seconds, statement
+        )
+
+
+def route_name(routes: List[BaseRoute], scope: Scope) -> str:
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, 'path', UNMATCHED)
+    return UNMATCHED
+
+
+# labelled by route templates so ids in paths don't add series
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, routes: List[BaseRoute]) -> None:
+        self.app = app
+        self.routes = routes
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = route_name(self.routes, scope)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            request_duration.observe(
+                time.perf_counter() - started,
+                scope['method'],
+                route,
+                str(status),
+            )
@@ -0,0 +1,143 @@
+import datetime
+from typing import Callable, List, NamedTuple, Sequence
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from onlyfilms import Base, search
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations',
+    metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied', DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def add_column(
+    connection: Connection, table: str, column: str, definition: str
+) -> None:
+    columns = {x['name'] for x in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.exec_driver_sql(
+            f'ALTER TABLE {table} ADD COLUMN {column} {definition}'
+        )
+
+
+def create_index(
+    connection: Connection,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    unique: bool = False,
+) -> None:
+    indexes = {x['name'] for x in inspect(connection).get_indexes(table)}
+    if name not in indexes:
+        connection.exec_driver_sql(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX {name} '
+            f'ON {table} ({", ".join(columns)})'
+        )
+
+
+# databases created before the catalog import and the film aggregates
+def film_catalog_columns(connection: Connection) -> None:
+    add_column(connection, 'films', 'external_id', 'VARCHAR(64)')
+    create_index(
+        connection, 'ix_films_external_id', 'films', ['external_id'], True
+    )
+    for column in ['score_sum', 'score_count', 'review_count']:
+        add_column(connection, 'films', column, 'INTEGER NOT NULL DEFAULT 0')
+    connection.exec_driver_sql(
+        'UPDATE films SET '
+        'score_sum = (SELECT COALESCE(SUM(score), 0) FROM reviews '
+        'WHERE reviews.film_id = films.id), '
+        'score_count = (SELECT COUNT(score) FROM reviews '
+        'WHERE reviews.film_id = films.id), '
+        'review_count = (SELECT COUNT(id) FROM reviews '
+        'WHERE reviews.film_id = films.id)'
+    )
+    search.rebuild_index(connection)
+
+
+def query_indexes(connection: Connection) -> None:
+    create_index(
+        connection,
+        'ix_reviews_film_created',
+        'reviews',
+        ['film_id', 'created', 'id'],
+    )
+    create_index(
+        connection, 'ix_reviews_film_score', 'reviews', ['film_id', 'score']
+    )
+    create_index(
+        connection, 'ix_tokens_token_created', 'tokens', ['token', 'created']
+    )
+    create_index(
+        connection, 'ix_tokens_user_created', 'tokens', ['user_id', 'created']
+    )
+    create_index(connection, 'ix_films_title', 'films', ['title'])
+
+
+MIGRATIONS = [
+    Migration(1, 'film catalog columns', film_catalog_columns),
+    Migration(2, 'query indexes', query_indexes),
+]
+
+
+def applied_versions(connection: Connection) -> List[int]:
+    return list(
+        connection.execute(select(schema_migrations.c.version)).scalars()
+    )
+
+
+def record(connection: Connection, migration: Migration) -> None:
+    connection.execute(
+        schema_migrations.insert().values(
+            version=migration.version,
+            name=migration.name,
+            applied=datetime.datetime.now(),
+        )
+    )
+
+
+# a new database gets the current schema, an existing one the migrations
+# it has not seen yet, each in its own transaction
+def migrate(engine: Engine) -> List[Migration]:
+    with engine.begin() as connection:
+        tables = set(inspect(connection).get_table_names())
+        metadata.create_all(connection)
+        Base.metadata.create_all(connection)
+        if 'films' not in tables:
+            for migration in MIGRATIONS:
+                record(connection, migration)
+            return []
+
+    pending = []
+    with engine.connect() as connection:
+        applied = set(applied_versions(connection))
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            record(connection, migration)
+        pending.append(migration)
+    return pending
@@ -4,20 +4,24 @@ import datetime
 from typing import List, Optional
 from uuid import uuid4
 
-import bcrypt
 from sqlalchemy import (
     Column,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    event,
+    inspect,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapper, relationship
 
 from onlyfilms import Base
+from onlyfilms.hashing import check_password, hash_password
 
 
 class User(Base):
@@ -31,15 +35,20 @@ class User(Base):
     tokens: List[Token] = relationship('Token', back_populates='user')
     reviews: List[Review] = relationship('Review', back_populates='author')
 
-    def __init__(self, login: str, password: str) -> None:
+    def __init__(
+        self,
+        login: str,
+        password: Optional[str] = None,
+        password_hash: Optional[bytes] = None,
+    ) -> None:
         self.login = login
-        self.password = bcrypt.hashpw(
-            password.encode('utf-8'), bcrypt.gensalt(10)
-        )
+        if password_hash is None:
+            password_hash = hash_password(password or '')
+        self.password = password_hash
         self.register_date = datetime.datetime.now()
 
     def check_password(self, password: str) -> bool:
-        return bcrypt.checkpw(password.encode('utf-8'), self.password)
+        return check_password(password, self.password)
 
     def __repr__(self) -> str:
         return f'<User {self.login}>'
@@ -56,6 +65,12 @@ class Token(Base):
 
     user: User = relationship('User', back_populates='tokens')
 
+    __table_args__ = (
+        # lookups filter out expired tokens without reading the rows
+        Index('ix_tokens_token_created', 'token', 'created'),
+        Index('ix_tokens_user_created', 'user_id', 'created'),
+    )
+
     def __init__(self, user: User) -> None:
         self.user = user
         self.token = str(uuid4())
@@ -84,13 +99,22 @@ class Review(Base):
 
     __table_args__ = (
         UniqueConstraint('author_id', 'film_id', name='_user_review_unique'),
+        Index('ix_reviews_film_created', 'film_id', 'created', 'id'),
+        # film aggregates are summed from the index alone
+        Index('ix_reviews_film_score', 'film_id', 'score'),
     )
 
     def __init__(
-        self, author: User, film: Film, text: str, score: Optional[int] = None
+        self,
+        author: Optional[User],
+        film: Optional[Film],
+        text: str,
+        score: Optional[int] = None,
     ) -> None:
-        self.film = film
-        self.author = author
+        if film is not None:
+            self.film = film
+        if author is not None:
+            self.author = author
         self.text = text
         self.created = datetime.datetime.now()
         self.score = score
@@ -109,9 +133,24 @@ class Film(Base):
     director: Optional[str] = Column(String(50), nullable=True, default=None)
     description: Optional[str] = Column(Text(2000), nullable=True, default=None)
     cover: Optional[str] = Column(String(500), nullable=True, default=None)
+    # id of the film in an imported catalog
+    external_id: Optional[str] = Column(
+        String(64), nullable=True, unique=True, default=None
+    )
+    score_sum: int = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
+    score_count: int = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
+    review_count: int = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
 
     reviews: List[Review] = relationship('Review', back_populates='film')
 
+    __table_args__ = (Index('ix_films_title', 'title'),)
+
     def __init__(
         self,
         title: str,
@@ -121,6 +160,62 @@ class Film(Base):
         self.title = title
         self.director = director
         self.cover = cover
+        self.score_sum = 0
+        self.score_count = 0
+        self.review_count = 0
 
     def __repr__(self) -> str:
         return f'<Film {self.title}>'
+
+
+FILM_AGGREGATES = ['score_sum', 'score_count', 'review_count']
+
+
+def update_film_aggregates(
+    connection: Connection,
+    film_id: Optional[int],
+    score: Optional[int],
+    sign: int,
+) -> None:
+    if film_id is None:
+        return
+
+    films = Film.__table__
+    connection.execute(
+        films.update()
+        .where(films.c.id == film_id)
+        .values(
+            score_sum=films.c.score_sum + sign * (score or 0),
+            score_count=films.c.score_count + (0 if score is None else sign),
+            review_count=films.c.review_count + sign,
+        )
+    )
+
+
+@event.listens_for(Review, 'after_insert')
+def _review_inserted(_: Mapper, connection: Connection, review: Review) -> None:
+    update_film_aggregates(connection, review.film_id, review.score, 1)
+
+
+@event.listens_for(Review, 'before_delete')
+def _review_deleted(_: Mapper, connection: Connection, review: Review) -> None:
+    update_film_aggregates(connection, review.film_id, review.score, -1)
+
+
+@event.listens_for(Review, 'after_update')
+def _review_updated(_: Mapper, connection: Connection, review: Review) -> None:
+    state = inspect(review)
+    film_history = state.attrs.film_id.history
+    score_history = state.attrs.score.history
+    if not film_history.has_changes() and not score_history.has_changes():
+        return
+
+    old_film_id = (
+        film_history.deleted[0] if film_history.deleted else review.film_id
+    )
+    old_score = score_history.deleted[0] if score_history.deleted else None
+    if not score_history.has_changes():
+        old_score = review.score
+
+    update_film_aggregates(connection, old_film_id, old_score, -1)
+    update_film_aggregates(connection, review.film_id, review.score, 1)
@@ -1,6 +1,14 @@
-from typing import Optional
+import datetime
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator, validator
+
+BATCH_LIMIT = 500
+
+
+# csv dumps have empty strings for missing values
+def empty_to_none(value: Any) -> Any:
+    return None if value == '' else value
 
 
 class RegisterModel(BaseModel):
@@ -11,3 +19,40 @@ class RegisterModel(BaseModel):
 class ReviewModel(BaseModel):
     text: str
     score: Optional[int] = Field(None, ge=0.0, le=10.0)
+
+
+class BatchReviewModel(ReviewModel):
+    film_id: int
+
+
+class ReviewBatchModel(BaseModel):
+    reviews: List[BatchReviewModel] = Field(
+        ..., min_items=1, max_items=BATCH_LIMIT
+    )
+
+
+class FilmRecord(BaseModel):
+    external_id: Optional[str] = Field(None, max_length=64)
+    title: str = Field(..., max_length=120)
+    director: Optional[str] = Field(None, max_length=50)
+    description: Optional[str] = Field(None, max_length=2000)
+    cover: Optional[str] = Field(None, max_length=500)
+
+    _empty_to_none = validator('*', pre=True, allow_reuse=True)(empty_to_none)
+
+
+class ReviewRecord(BaseModel):
+    author: str = Field(..., max_length=25)
+    film_id: Optional[int] = None
+    film_external_id: Optional[str] = Field(None, max_length=64)
+    text: Optional[str] = Field(None, max_length=2000)
+    score: Optional[int] = Field(None, ge=0, le=10)
+    created: Optional[datetime.datetime] = None
+
+    _empty_to_none = validator('*', pre=True, allow_reuse=True)(empty_to_none)
+
+    @root_validator(skip_on_failure=True)
+    def film_reference(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if values['film_id'] is None and values['film_external_id'] is None:
+            raise ValueError('film_id or film_external_id is required')
+        return values
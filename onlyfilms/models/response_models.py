@@ -1,11 +1,14 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 from pydantic_sqlalchemy import sqlalchemy_to_pydantic
+from sqlalchemy.engine import Row
 
-from onlyfilms.models.orm import Film, Review, User
+from onlyfilms.models.orm import FILM_AGGREGATES, Film, Review, User
 
-FilmModelBase = sqlalchemy_to_pydantic(Film)
+FilmModelBase = sqlalchemy_to_pydantic(
+    Film, exclude=[*FILM_AGGREGATES, 'external_id']
+)
 UserModel = sqlalchemy_to_pydantic(User, exclude=['password', 'register_date'])
 ReviewModelBase = sqlalchemy_to_pydantic(Review, exclude=['author_id'])
 
@@ -21,17 +24,82 @@ class FilmModel(FilmModelBase):  # type: ignore
 
 class Films(BaseModel):
     films: List[FilmModel]
-    total: int
-    offset: int
+    total: Optional[int] = None
+    # False when total is only a lower bound of the search matches
+    total_exact: Optional[bool] = None
+    offset: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class Reviews(BaseModel):
     reviews: List[ReviewModel]
-    total: int
-    offset: int
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None
+    offset: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class FilmInfoModel(BaseModel):
     film: FilmModel
     reviews: List[ReviewModel]
     score: Optional[float]
+
+
+class ReviewStatus(BaseModel):
+    film_id: int
+    status: int
+    review_id: Optional[int] = None
+
+
+class ReviewBatchResult(BaseModel):
+    results: List[ReviewStatus]
+    created: int
+
+
+FILM_FIELDS = ['id', 'title', 'director', 'description', 'cover', 'evaluators']
+
+
+# dicts shaped like FilmModel and ReviewModel built from manager.*_ROW rows
+def film_row(row: Row) -> Dict[str, Any]:
+    film = row._asdict()
+    film.pop('total', None)
+    return film
+
+
+def review_row(row: Row) -> Dict[str, Any]:
+    author = None
+    if row.author_id is not None:
+        author = {'id': row.author_id, 'login': row.author_login}
+    return {
+        'id': row.id,
+        'film_id': row.film_id,
+        'created': row.created,
+        'text': row.text,
+        'score': row.score,
+        'author': author,
+    }
+
+
+# a FilmInfoModel dict from the rows of manager.get_film_page
+def film_page(rows: List[Row]) -> Dict[str, Any]:
+    first = rows[0]
+    score = None if first.score is None else round(first.score, 1)
+    film = {name: getattr(first, name) for name in FILM_FIELDS}
+    film['score'] = score
+    reviews = [
+        {
+            'id': row.review_id,
+            'film_id': first.id,
+            'created': row.review_created,
+            'text': row.review_text,
+            'score': row.review_score,
+            'author': (
+                None
+                if row.author_id is None
+                else {'id': row.author_id, 'login': row.author_login}
+            ),
+        }
+        for row in rows
+        if row.review_id is not None
+    ]
+    return {'film': film, 'reviews': reviews, 'score': score}
@@ -0,0 +1,25 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Type
+
+
+def encode_cursor(*values: Any) -> str:
+    data = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: Type[Any]) -> List[Any]:
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError(f'Invalid cursor {cursor!r}') from error
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(f'Invalid cursor {cursor!r}')
+    for value, value_type in zip(values, types):
+        # bool is an int subclass, json true must not pass as an id
+        if not isinstance(value, value_type) or isinstance(value, bool):
+            raise ValueError(f'Invalid cursor {cursor!r}')
+    return values
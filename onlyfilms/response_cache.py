@@ -0,0 +1,158 @@
+import hashlib
+import json
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from itertools import chain
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from onlyfilms.cache import create_backend
+from onlyfilms.models.orm import Film, Review
+from onlyfilms.settings import settings
+
+T = TypeVar('T')
+
+TOUCHED_FILMS = 'touched_films'
+# version names: every entry, film listings and a single film
+GENERATION = 'generation'
+FILMS = 'films'
+
+backend = create_backend(
+    settings.response_cache_url,
+    settings.response_cache_size,
+    settings.response_cache_ttl,
+)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    modified: float
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            'ETag': self.etag,
+            'Last-Modified': formatdate(self.modified, usegmt=True),
+        }
+
+
+def film_version(film_id: int) -> str:
+    return f'film:{film_id}'
+
+
+def _key(scope: str, params: Iterable[Any]) -> str:
+    generation = backend.version(GENERATION)
+    return f'{generation}:{scope}:{json.dumps(list(params))}'
+
+
+def films_key(*params: Any) -> str:
+    return _key(f'films:{backend.version(FILMS)}', params)
+
+
+def film_key(film_id: int, *params: Any) -> str:
+    version = backend.version(film_version(film_id))
+    return _key(f'film:{film_id}:{version}', params)
+
+
+def invalidate_films(film_ids: Iterable[int]) -> None:
+    backend.bump(FILMS, *(film_version(film_id) for film_id in film_ids))
+
+
+def invalidate_all() -> None:
+    backend.bump(GENERATION)
+
+
+async def cached(
+    key: str, build: Callable[[], Awaitable[Optional[T]]]
+) -> Optional[T]:
+    value = backend.get(key)
+    if value is None:
+        value = await build()
+        if value is not None:
+            backend.set(key, value)
+    return value
+
+
+def not_modified(request: Request, entry: CachedResponse) -> bool:
+    etags = request.headers.get('if-none-match')
+    if etags is not None:
+        candidates = [etag.strip() for etag in etags.split(',')]
+        return entry.etag in candidates or '*' in candidates
+
+    since = request.headers.get('if-modified-since')
+    if since is None:
+        return False
+    try:
+        return int(entry.modified) <= parsedate_to_datetime(since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def encode(value: Union[BaseModel, Dict[str, Any]]) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.json().encode('utf-8')
+    return orjson.dumps(value)
+
+
+async def cached_json(
+    request: Request,
+    key: str,
+    build: Callable[[], Awaitable[Union[BaseModel, Dict[str, Any]]]],
+) -> Response:
+    entry: Optional[CachedResponse] = backend.get(key)
+    if entry is None:
+        body = encode(await build())
+        entry = CachedResponse(
+            body, f'"{hashlib.sha1(body).hexdigest()}"', time.time()
+        )
+        backend.set(key, entry)
+
+    if not_modified(request, entry):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers=entry.headers
+        )
+    return Response(
+        entry.body, media_type='application/json', headers=entry.headers
+    )
+
+
+# every session (manager, async manager, admin) invalidates after commit
+@event.listens_for(Session, 'after_flush')
+def _collect_touched_films(session: Session, _: Any) -> None:
+    touched = session.info.setdefault(TOUCHED_FILMS, set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Film):
+            touched.add(instance.id)
+        elif isinstance(instance, Review):
+            touched.add(instance.film_id)
+            touched.update(inspect(instance).attrs.film_id.history.deleted)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_touched_films(session: Session) -> None:
+    touched = session.info.pop(TOUCHED_FILMS, None)
+    if touched:
+        invalidate_films(x for x in touched if x is not None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_touched_films(session: Session) -> None:
+    session.info.pop(TOUCHED_FILMS, None)
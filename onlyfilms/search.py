@@ -0,0 +1,149 @@
+import re
+from typing import Any, Dict, Optional
+
+from sqlalchemy import DDL, column, event, literal_column, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import Select
+
+from onlyfilms.models.orm import Film
+
+FTS_TABLE = 'films_fts'
+# bm25 weights of title, director and description columns
+FTS_RANK = 'bm25(10.0, 5.0, 1.0)'
+
+FTS_RANK_CONFIG = (
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) '
+    f"VALUES ('rank', '{FTS_RANK}')"
+)
+
+FTS_DDL = [
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    'title, director, description, '
+    "content='films', content_rowid='id', tokenize='unicode61', "
+    "prefix='2 3')",
+    FTS_RANK_CONFIG,
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON films '
+    f'BEGIN INSERT INTO {FTS_TABLE}(rowid, title, director, description) '
+    'VALUES (new.id, new.title, new.director, new.description); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON films '
+    f'BEGIN INSERT INTO {FTS_TABLE}'
+    f'({FTS_TABLE}, rowid, title, director, description) '
+    "VALUES ('delete', old.id, old.title, old.director, old.description); "
+    'END',
+    # aggregates are updated on every review, so only watch indexed columns
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    'AFTER UPDATE OF title, director, description ON films '
+    f'BEGIN INSERT INTO {FTS_TABLE}'
+    f'({FTS_TABLE}, rowid, title, director, description) '
+    "VALUES ('delete', old.id, old.title, old.director, old.description); "
+    f'INSERT INTO {FTS_TABLE}(rowid, title, director, description) '
+    'VALUES (new.id, new.title, new.director, new.description); END',
+]
+
+for statement in FTS_DDL:
+    event.listen(
+        Film.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
+
+WORD = re.compile(r'\w+')
+
+fts_table = table(FTS_TABLE, column('rowid'), column('rank'))
+
+
+def match_expression(text: str) -> Optional[str]:
+    words = WORD.findall(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchBackend:
+    def filter(self, query: Query, text: str) -> Query:
+        raise NotImplementedError
+
+    # filter and order by relevance keeping at least `limit` best hits,
+    # without a relevance the first hits in id order are kept
+    def rank(self, query: Query, text: str, limit: int) -> Query:
+        hits = (
+            self.filter(select(Film.id), text)
+            .order_by(Film.id)
+            .limit(limit)
+            .subquery()
+        )
+        return query.join(hits, hits.c.id == Film.id)
+
+
+class LikeSearch(SearchBackend):
+    def filter(self, query: Query, text: str) -> Query:
+        pattern = '%' + text + '%'
+        return query.filter(
+            Film.title.ilike(pattern)
+            | Film.director.ilike(pattern)
+            | Film.description.ilike(pattern)
+        )
+
+
+class Fts5Search(SearchBackend):
+    def filter(self, query: Query, text: str) -> Query:
+        expression = match_expression(text)
+        if expression is None:
+            return LikeSearch().filter(query, text)
+
+        return query.filter(Film.id.in_(self._hits(expression)))
+
+    def rank(self, query: Query, text: str, limit: int) -> Query:
+        expression = match_expression(text)
+        if expression is None:
+            return LikeSearch().rank(query, text, limit)
+
+        # fts5 picks the best `limit` hits without touching the films table
+        hits = (
+            self._hits(expression, fts_table.c.rank)
+            .order_by(fts_table.c.rank)
+            .limit(limit)
+            .subquery()
+        )
+        return query.join(hits, hits.c.rowid == Film.id).order_by(hits.c.rank)
+
+    @staticmethod
+    def _hits(expression: str, *columns: Any) -> Select:
+        return select(fts_table.c.rowid, *columns).where(
+            literal_column(FTS_TABLE).op('MATCH')(expression)
+        )
+
+
+BACKENDS: Dict[str, SearchBackend] = {
+    'like': LikeSearch(),
+    'fts5': Fts5Search(),
+}
+
+# None picks the best backend supported by the database dialect
+DEFAULT_BACKEND: Optional[str] = None
+
+
+def get_backend(dialect: str) -> SearchBackend:
+    if DEFAULT_BACKEND is not None:
+        return BACKENDS[DEFAULT_BACKEND]
+    return BACKENDS['fts5' if dialect == 'sqlite' else 'like']
+
+
+def rebuild_index(connection: Connection) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+
+    for ddl in FTS_DDL:
+        if ddl is not FTS_RANK_CONFIG:
+            connection.exec_driver_sql(ddl)
+    # rewriting the rank makes the next search of every other open
+    # connection fail with "SQL logic error", so only set it when it changed
+    rank = connection.exec_driver_sql(
+        f"SELECT v FROM {FTS_TABLE}_config WHERE k = 'rank'"
+    ).scalar()
+    if rank != FTS_RANK:
+        connection.exec_driver_sql(FTS_RANK_CONFIG)
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+    )
@@ -0,0 +1,58 @@
+import asyncio
+import socket
+from typing import List, Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from onlyfilms.settings import Settings
+
+# every worker imports the factory and builds its own app
+APP = 'onlyfilms.app:create_app'
+
+
+# gives in-flight requests graceful_timeout seconds after a shutdown signal
+class GracefulServer(uvicorn.Server):
+    def __init__(
+        self, config: uvicorn.Config, graceful_timeout: Optional[float]
+    ) -> None:
+        super().__init__(config)
+        self.graceful_timeout = graceful_timeout
+
+    def force(self) -> None:
+        self.force_exit = True
+
+    async def shutdown(
+        self, sockets: Optional[List[socket.socket]] = None
+    ) -> None:
+        if self.graceful_timeout is not None:
+            asyncio.get_running_loop().call_later(
+                self.graceful_timeout, self.force
+            )
+        await super().shutdown(sockets)
+
+
+def create_config(options: Settings) -> uvicorn.Config:
+    return uvicorn.Config(
+        APP,
+        factory=True,
+        host=options.server_host,
+        port=options.server_port,
+        workers=options.server_workers,
+        backlog=options.server_backlog,
+        timeout_keep_alive=options.server_keep_alive,
+        loop=options.server_loop,
+        http=options.server_http,
+        # uvicorn logs through the JSON handler of logger.conf
+        log_config=None,
+    )
+
+
+def serve(config: uvicorn.Config, graceful_timeout: Optional[float]) -> None:
+    server = GracefulServer(config, graceful_timeout)
+    if config.workers > 1:
+        # spawned workers share the listening socket of this process
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
@@ -0,0 +1,83 @@
+from typing import Literal, Optional
+
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    database_url: str = 'sqlite:///films.db'
+    # derived from database_url when not set
+    async_database_url: Optional[str] = None
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    # seconds, applied by databases that support it (PostgreSQL)
+    statement_timeout: Optional[float] = None
+    # seconds, slower statements are logged with their manager function,
+    # 0 disables the log
+    slow_query_threshold: float = 0.5
+
+    sqlite_journal_mode: str = 'WAL'
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_busy_timeout: int = 5000
+
+    # search totals stop counting past this many matches, 0 counts all
+    search_total_limit: int = 1000
+
+    # memory:// or a redis:// url shared by all workers
+    response_cache_url: str = 'memory://'
+    response_cache_size: int = 2048
+    response_cache_ttl: float = 300.0
+    # smaller responses are sent uncompressed
+    compression_minimum_size: int = 1024
+    # jinja bytecode shared by all workers, a temporary directory when unset
+    template_cache_dir: Optional[str] = None
+
+    token_cache_size: int = 10000
+    token_cache_ttl: float = 300.0
+    # older tokens of a user are deleted on login, 0 keeps all of them
+    token_max_per_user: int = 10
+    # seconds between deletions of expired tokens, 0 disables the sweeper
+    token_purge_interval: float = 3600.0
+    token_purge_batch: int = 1000
+    # signed tokens are verified without the database
+    token_backend: Literal['database', 'signed'] = 'database'
+    # id:secret pairs, the first one signs, derived from secret_key when unset
+    token_signing_keys: Optional[str] = None
+    # signs admin sessions, the same for every worker; random when unset
+    secret_key: Optional[str] = None
+
+    # log records waiting for the writer thread, more are dropped
+    log_queue_size: int = 10000
+    # longer strings in log records are cut, 0 keeps them whole
+    log_field_limit: int = 1000
+    # logger:N pairs, each info message of the logger is kept once every N
+    log_sampling: str = ''
+
+    # uvicorn, the address and the workers can be given to `start` too
+    server_host: str = '127.0.0.1'
+    server_port: int = 8000
+    # processes, WEB_CONCURRENCY or 1 when unset
+    server_workers: Optional[int] = None
+    server_backlog: int = 2048
+    # seconds idle connections stay open
+    server_keep_alive: int = 5
+    # auto uses uvloop and httptools when they are installed
+    server_loop: str = 'auto'
+    server_http: str = 'auto'
+    # seconds to finish requests on shutdown, no limit when unset
+    server_graceful_timeout: Optional[float] = None
+
+    bcrypt_rounds: int = 10
+    # 0 hashes passwords inline on the request thread
+    hash_workers: int = 2
+    hash_queue_limit: int = 32
+    hash_retry_after: int = 1
+
+    class Config:
+        env_prefix = 'ONLYFILMS_'
+
+
+settings = Settings()
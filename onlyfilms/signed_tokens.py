@@ -0,0 +1,134 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from onlyfilms.cache import CacheBackend, create_backend
+from onlyfilms.models.orm import Token
+from onlyfilms.settings import settings
+
+PREFIX = 's1'
+
+
+class Claims(NamedTuple):
+    user_id: int
+    login: str
+    expires: int
+    # tells apart tokens issued in the same second, for revocation
+    token_id: str
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def parse_keys(keys: str) -> List[Tuple[str, bytes]]:
+    parsed = []
+    for item in keys.split(','):
+        key_id, _, secret = item.strip().partition(':')
+        if not key_id or not secret or '.' in key_id:
+            raise ValueError('Token signing keys must look like id:secret')
+        parsed.append((key_id, secret.encode('utf-8')))
+    return parsed
+
+
+def is_signed(token: str) -> bool:
+    return token.startswith(PREFIX + '.')
+
+
+# s1.<key id>.<claims>.<hmac>, verified without the database
+class TokenSigner:
+    def __init__(
+        self,
+        keys: List[Tuple[str, bytes]],
+        lifetime: float,
+        revoked: CacheBackend,
+    ) -> None:
+        if not keys:
+            raise ValueError('A token signing key is required')
+        # the first key signs, the others only verify tokens issued before
+        # a rotation
+        self.key_id, self.key = keys[0]
+        self.keys = dict(keys)
+        self.lifetime = lifetime
+        self.revoked = revoked
+
+    def _sign(self, key_id: str, key: bytes, claims: str) -> str:
+        message = f'{PREFIX}.{key_id}.{claims}'
+        digest = hmac.new(key, message.encode('ascii'), hashlib.sha256)
+        return f'{message}.{_encode(digest.digest())}'
+
+    def issue(self, user_id: int, login: str) -> str:
+        expires = int(time.time() + self.lifetime)
+        token_id = secrets.token_urlsafe(6)
+        claims = _encode(orjson.dumps([user_id, login, expires, token_id]))
+        return self._sign(self.key_id, self.key, claims)
+
+    def verify(self, token: str) -> Optional[Claims]:
+        parts = token.split('.')
+        if len(parts) != 4 or parts[0] != PREFIX:
+            return None
+        key = self.keys.get(parts[1])
+        if key is None or not hmac.compare_digest(
+            self._sign(parts[1], key, parts[2]), token
+        ):
+            return None
+
+        try:
+            claims = Claims(*orjson.loads(_decode(parts[2])))
+        except (binascii.Error, TypeError, ValueError):
+            return None
+        if claims.expires <= time.time():
+            return None
+        if self.revoked.get(f'revoked:{parts[3]}') is not None:
+            return None
+        return claims
+
+    def revoke(self, token: str) -> bool:
+        claims = self.verify(token)
+        if claims is None:
+            return False
+        # kept only until the token would expire anyway
+        self.revoked.set(
+            f'revoked:{token.rsplit(".", 1)[1]}',
+            True,
+            claims.expires - time.time(),
+        )
+        return True
+
+
+def derive_key(secret: str) -> bytes:
+    return hmac.new(
+        secret.encode('utf-8'), b'onlyfilms token signing', hashlib.sha256
+    ).digest()
+
+
+def create_signer() -> TokenSigner:
+    if settings.token_signing_keys:
+        keys = parse_keys(settings.token_signing_keys)
+    elif settings.secret_key:
+        keys = [('derived', derive_key(settings.secret_key))]
+    else:
+        # tokens stop verifying on restart and in other workers
+        keys = [('local', secrets.token_bytes(32))]
+    return TokenSigner(
+        keys,
+        Token.EXPIRE.total_seconds(),
+        create_backend(
+            settings.response_cache_url,
+            settings.token_cache_size,
+            Token.EXPIRE.total_seconds(),
+        ),
+    )
+
+
+signer = create_signer()
@@ -1,28 +1,16 @@
-from functools import wraps
-from typing import Any, Callable
+from typing import Optional
 
-from flask import request
+from fastapi import Request
 
-from onlyfilms import Session
-from onlyfilms.models.orm import Token
+from onlyfilms.auth import AuthUser, resolve_token_async
 
 
-def authorized(func: Callable[..., Any]):  # type: ignore
-    @wraps(func)
-    def wrapper(*args, **kwargs):  # type: ignore
-        token = request.headers.get('Authorization', None)
-        if not token:
-            token = request.cookies.get('token', None)
-        user = None
+def request_token(request: Request) -> Optional[str]:
+    token = request.headers.get('Authorization', None)
+    if not token:
+        token = request.cookies.get('token', None)
+    return token
 
-        with Session() as session:
-            real_token: Token = (
-                session.query(Token).filter(Token.token == token).first()
-            )
 
-            if real_token:
-                user = real_token.user
-
-        return func(*args, user=user, **kwargs)
-
-    return wrapper
+async def authorized(request: Request) -> Optional[AuthUser]:
+    return await resolve_token_async(request_token(request))
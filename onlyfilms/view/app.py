@@ -1,142 +1,229 @@
-import secrets
+import os
 from http import HTTPStatus
-from typing import Any, Tuple
-
-from flask import (
-    Flask,
-    Response,
-    abort,
-    make_response,
-    redirect,
-    render_template,
-    request,
-    url_for,
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from onlyfilms import async_manager, auth, logger, response_cache
+from onlyfilms.auth import AuthUser
+from onlyfilms.models import response_models
+from onlyfilms.settings import settings
+from onlyfilms.view import authorized, request_token
+
+VIEW_DIR = os.path.dirname(__file__)
+
+router = APIRouter(prefix='/onlyfilms')
+templates = Jinja2Templates(directory=os.path.join(VIEW_DIR, 'templates'))
+static = StaticFiles(directory=os.path.join(VIEW_DIR, 'static'))
+# compiled templates are shared by the workers and never checked for changes
+templates.env.bytecode_cache = FileSystemBytecodeCache(
+    settings.template_cache_dir
 )
+templates.env.auto_reload = False
+
+FILM_PAGE_REVIEWS = 5
+
+
+def render(
+    request: Request,
+    name: str,
+    user: Optional[AuthUser] = None,
+    status_code: int = HTTPStatus.OK,
+    **context: Any,
+) -> Response:
+    return templates.TemplateResponse(
+        name,
+        {
+            'request': request,
+            'authorized': user is not None,
+            'user': user,
+            **context,
+        },
+        status_code=status_code,
+    )
+
+
+def fragment(key: str, name: str, **context: Any) -> Markup:
+    html = response_cache.backend.get(key)
+    if html is None:
+        html = templates.get_template(name).render(**context)
+        response_cache.backend.set(key, html)
+    return Markup(html)
+
+
+def film_card(film: Dict[str, Any]) -> Markup:
+    return fragment(
+        response_cache.film_key(film['id'], 'card'),
+        'fragments/film_card.html',
+        film=film,
+    )
+
+
+# the app wide 404 handler, unmatched pages under the interface get the
+# 404 page instead of the JSON error of the API
+async def not_found_handler(
+    request: Request, error: StarletteHTTPException
+) -> Response:
+    if request.url.path.startswith(router.prefix):
+        return render(request, '404.html', status_code=HTTPStatus.NOT_FOUND)
+    return await http_exception_handler(request, error)
+
+
+def redirect(request: Request, name: str, **params: Any) -> RedirectResponse:
+    return RedirectResponse(
+        request.url_for(name, **params), status_code=HTTPStatus.FOUND
+    )
 
-from onlyfilms import logger, manager
-from onlyfilms.admin import create_admin
-from onlyfilms.models import response_models
-from onlyfilms.models.orm import User
-from onlyfilms.view import authorized
 
-app = Flask(__name__, static_url_path='/static')
-app.config['SECRET_KEY'] = secrets.token_hex(16)
+async def film_list(query: str) -> List[Dict[str, Any]]:
+    films, _ = await async_manager.get_film_rows(query)
+    return [response_models.film_row(film) for film in films]
 
-create_admin(app)
 
+async def film_data(film_id: int) -> Optional[Dict[str, Any]]:
+    rows = await async_manager.get_film_page(film_id, FILM_PAGE_REVIEWS)
+    if not rows:
+        return None
 
-@app.get('/')
-@authorized
-def index_page(user: User) -> str:
-    query = request.args.get('query', '')
+    page = response_models.film_page(rows)
+    page['film']['score'] = page['score'] or 0.0
+    return page
+
+
+@router.get('/', response_class=HTMLResponse)
+async def index_page(
+    request: Request,
+    query: str = '',
+    user: Optional[AuthUser] = Depends(authorized),
+) -> Response:
     logger.info('Query: %s', query)
-    films, _ = manager.get_films(query=query)
-    film_models = []
-    for film, score, evaluators in films:
-        model = response_models.FilmModel.from_orm(film)
-        model.score = score
-        model.evaluators = evaluators
-        film_models.append(model)
-
-    return render_template(
+    films = await response_cache.cached(
+        response_cache.films_key('index', query), lambda: film_list(query)
+    )
+
+    return render(
+        request,
         'index.html',
-        films=film_models,
-        authorized=user is not None,
-        user=user,
+        user,
+        # cached() is Optional for builders that find nothing, film_list
+        # always returns a list
+        cards=[film_card(film) for film in films or []],
         search_holder=(query if query else 'Search'),
     )
 
 
-@app.get('/film/<int:film_id>')
-@authorized
-def film_page(film_id: int, user: User) -> str:
-    film, score, evaluators = manager.get_film_by_id(film_id=film_id)
-    if film is None:
-        return abort(HTTPStatus.NOT_FOUND)
+@router.get('/film/{film_id}', response_class=HTMLResponse)
+async def film_page(
+    request: Request,
+    film_id: int,
+    user: Optional[AuthUser] = Depends(authorized),
+) -> Response:
+    page = await response_cache.cached(
+        response_cache.film_key(film_id, 'page'), lambda: film_data(film_id)
+    )
+    if page is None:
+        return render(request, '404.html', user, HTTPStatus.NOT_FOUND)
 
-    reviews, _ = manager.get_reviews(film_id, 5)
-    film_model = response_models.FilmModel.from_orm(film)
-    film_model.score = score if score else 0.0
-    film_model.evaluators = evaluators
-    logger.info('Info page of film: %s', film)
+    film = page['film']
+    logger.info('Info page of film: %s', film['title'])
 
-    return render_template(
+    return render(
+        request,
         'filmpage.html',
-        authorized=user is not None,
-        user=user,
-        film=film_model,
-        reviews=reviews,
+        user,
+        film=film,
+        score=fragment(
+            response_cache.film_key(film_id, 'score'),
+            'fragments/film_score.html',
+            film=film,
+        ),
+        reviews=fragment(
+            response_cache.film_key(film_id, 'reviews'),
+            'fragments/reviews.html',
+            reviews=page['reviews'],
+        ),
     )
 
 
-@app.post('/film/<int:film_id>/review')
-@authorized
-def film_review(film_id: int, user: User) -> Any:
-    text = request.form.get('text')
-    if manager.post_review(film_id, user, text)[0] == HTTPStatus.CREATED:
-        logger.info('review for film %d with text %s created', film_id, text)
+@router.post('/film/{film_id}/review')
+async def film_review(
+    request: Request,
+    film_id: int,
+    user: Optional[AuthUser] = Depends(authorized),
+) -> Response:
+    if user is None:
+        return redirect(request, 'login_page')
+
+    text = (await request.form()).get('text')
+    status, _ = await async_manager.post_review(film_id, user, text)
+    if status == HTTPStatus.CREATED:
+        logger.info('review for film %d created', film_id)
     else:
         logger.info('review creation filed')
-    return redirect(url_for('.film_page', film_id=film_id))
+    return redirect(request, 'film_page', film_id=film_id)
+
+
+def logged_in(request: Request, token: str) -> Response:
+    response = redirect(request, 'index_page')
+    response.set_cookie('token', token)
+    return response
 
 
-@app.route('/register', methods=['GET', 'POST'])
-def register_handler() -> Any:
+@router.api_route(
+    '/register', methods=['GET', 'POST'], response_class=HTMLResponse
+)
+async def register_page(request: Request) -> Response:
     if request.method == 'GET':
-        return render_template('register.html')
+        return render(request, 'register.html')
 
-    login = request.form.get('login')
-    password = request.form.get('password')
+    form = await request.form()
+    login = form.get('login')
+    password = form.get('password')
 
     logger.info('registration request with login: %s', login)
     if login and password:
-        if manager.regster_user(login, password):
-            token = manager.login_user(login, password)
+        if await async_manager.regster_user(login, password):
+            token = await async_manager.login_user(login, password)
 
             logger.info('new user registered: %s', login)
-            logger.info('new token created: %s', token)
-
-            response = make_response(
-                redirect(url_for('.index_page'), HTTPStatus.FOUND)
-            )
-            response.set_cookie('token', token)
 
-            return response
+            if token is None:
+                return redirect(request, 'login_page')
+            return logged_in(request, token)
 
     logger.info('registration failed: <User %s>', login)
-    return 'wrong data'
+    return HTMLResponse('wrong data')
 
 
-@app.route('/login', methods=['GET', 'POST'])
-def login_handler() -> Any:
+@router.api_route(
+    '/login', methods=['GET', 'POST'], response_class=HTMLResponse
+)
+async def login_page(request: Request) -> Response:
     if request.method == 'GET':
-        return render_template('login.html')
+        return render(request, 'login.html')
 
-    login = request.form.get('login')
-    password = request.form.get('password')
+    form = await request.form()
+    login = form.get('login')
+    password = form.get('password')
 
     if login and password:
-        token = manager.login_user(login, password)
-        if not token:
-            logger.info('sign in failed: <User %s>', login)
-            return abort(HTTPStatus.CONFLICT)
-        response = make_response(
-            redirect(url_for('.index_page'), HTTPStatus.FOUND)
-        )
-        response.set_cookie('token', token)
-
-        return response
+        token = await async_manager.login_user(login, password)
+        if token is not None:
+            return logged_in(request, token)
     logger.info('sign in failed: <User %s>', login)
-    return abort(HTTPStatus.CONFLICT)
+    raise HTTPException(status_code=HTTPStatus.CONFLICT)
 
 
-@app.route('/logout', methods=['GET', 'POST'])
-def logout_handler() -> Response:
-    response = make_response(redirect(url_for('.index_page'), HTTPStatus.FOUND))
-    response.set_cookie('token', '', expires=0)
+@router.api_route('/logout', methods=['GET', 'POST'])
+async def logout_page(request: Request) -> Response:
+    await auth.logout_async(request_token(request))
+    response = redirect(request, 'index_page')
+    response.delete_cookie('token')
     return response
-
-
-@app.errorhandler(HTTPStatus.NOT_FOUND)
-def not_found_error(_: Exception) -> Tuple[str, int]:
-    return render_template('404.html'), HTTPStatus.NOT_FOUND
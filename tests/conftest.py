@@ -1,33 +1,57 @@
+import asyncio
 import os
 
 import pytest
 from fastapi.testclient import TestClient
 from pytest_mock import MockerFixture
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, sessionmaker
 
-from onlyfilms import Base
-from onlyfilms.__main__ import create_app
+from onlyfilms import Base, response_cache
+from onlyfilms.app import create_app
+from onlyfilms.database import create_async_db_engine, create_db_engine
 from onlyfilms.models.orm import Film, Review, Token, User
+from onlyfilms.settings import Settings
 
 
 @pytest.fixture(scope='session')
-def test_db():
-    if os.path.exists('./test.db'):
-        os.remove('./test.db')
+def test_settings():
+    return Settings(database_url='sqlite:///test.db')
 
-    engine = create_engine('sqlite:///test.db')
+
+def remove_test_db():
+    for path in ('./test.db', './test.db-wal', './test.db-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@pytest.fixture(scope='session')
+def test_db(test_settings):
+    remove_test_db()
+
+    engine = create_db_engine(test_settings)
     Base.metadata.create_all(bind=engine)
     TestSession = sessionmaker(bind=engine, expire_on_commit=False)
     yield TestSession
-    os.remove('./test.db')
+    engine.dispose()
+    remove_test_db()
 
 
 @pytest.fixture(scope='session')
-def fake_db(test_db, session_mocker: MockerFixture):
+def test_async_db(test_db, test_settings):
+    engine = create_async_db_engine(test_settings)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # pooled aiosqlite connections keep the interpreter alive until closed
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(scope='session')
+def fake_db(test_db, test_async_db, session_mocker: MockerFixture):
     session_mocker.patch('onlyfilms.Session', test_db)
-    session_mocker.patch('onlyfilms.manager.SessionCreator', test_db)
-    session_mocker.patch('onlyfilms.api.Session', test_db)
+    session_mocker.patch('onlyfilms.manager.base.SessionCreator', test_db)
+    session_mocker.patch(
+        'onlyfilms.async_manager.AsyncSessionCreator', test_async_db
+    )
 
 
 @pytest.fixture(scope='session')
@@ -147,6 +171,14 @@ def deleted_review(test_db, fake_users, fake_films):
 
     yield review
 
+    # an orm delete keeps the film aggregates in sync
     with test_db() as session:
-        session.query(Review).filter(Review.id == review_id).delete()
-        session.commit()
+        review = session.get(Review, review_id)
+        if review is not None:
+            session.delete(review)
+            session.commit()
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    response_cache.invalidate_all()
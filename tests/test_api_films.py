@@ -1,11 +1,15 @@
+import json
 from http import HTTPStatus
 
+import pytest
 from fastapi.testclient import TestClient
 from pytest_mock import MockerFixture
 from sqlalchemy.orm import Session
 
 from onlyfilms import manager
+from onlyfilms.models import response_models
 from onlyfilms.models.orm import Review, Token
+from onlyfilms.pagination import encode_cursor
 
 
 def test_clear_films_request(client: TestClient, fake_db, fake_films):
@@ -16,6 +20,7 @@ def test_clear_films_request(client: TestClient, fake_db, fake_films):
     data = response.json()
 
     assert data['total'] == 10
+    assert data['total_exact'] is True
     assert len(data['films']) == 10
 
 
@@ -97,11 +102,74 @@ def test_ok_review(
 
     with test_db() as session:
         session: Session
-        session.query(Review).filter(Review.id == review_id).delete()
+        session.delete(session.get(Review, review_id))
         session.commit()
     # TODO check review exists
 
 
+def test_review_batch(
+    client: TestClient,
+    test_db,
+    fake_db,
+    fake_films,
+    register_user,
+    valid_user_token: str,
+):
+    body = {
+        'reviews': [
+            {'film_id': 7, 'text': 'first', 'score': 8},
+            {'film_id': 7, 'text': 'again', 'score': 1},
+            {'film_id': 666, 'text': 'nowhere'},
+            {'film_id': 8, 'text': 'second'},
+        ]
+    }
+    header = {'authorization': valid_user_token}
+    response = client.post(
+        '/api/films/reviews:batch', json=body, headers=header
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+
+    assert data['created'] == 2
+    assert [x['status'] for x in data['results']] == [
+        HTTPStatus.CREATED,
+        HTTPStatus.CONFLICT,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.CREATED,
+    ]
+    review_ids = [x['review_id'] for x in data['results'] if x['review_id']]
+    assert len(review_ids) == 2
+
+    film = client.get('/api/films/7').json()
+    assert film['score'] == 8
+    assert film['evaluators'] == 1
+
+    with test_db() as session:
+        session: Session
+        for review_id in review_ids:
+            session.delete(session.get(Review, review_id))
+        session.commit()
+
+
+def test_review_batch_validation(
+    client: TestClient, fake_db, register_user, valid_user_token: str
+):
+    header = {'authorization': valid_user_token}
+    response = client.post(
+        '/api/films/reviews:batch', json={'reviews': []}, headers=header
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.post(
+        '/api/films/reviews:batch',
+        json={'reviews': [{'film_id': 1, 'text': 'x'}]},
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
 def test_not_found_review(
     client: TestClient,
     fake_db,
@@ -164,6 +232,13 @@ def test_getting_reviews_with_limit_and_offset(
     assert data['reviews'][0]['text'] == 'test review #3'
 
 
+@pytest.mark.parametrize('params', ['offset=-1', 'limit=51'])
+def test_reviews_page_bounds(client: TestClient, fake_db, params):
+    response = client.get(f'/api/films/1/reviews?{params}')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 def test_getting_specific_review(client: TestClient, fake_db, fake_reviews):
     response = client.get('/api/films/1/reviews/1')
 
@@ -220,3 +295,123 @@ def test_delete_someone_else_review(
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     deleter.assert_called_once()
+
+
+def test_films_cursor_pagination(client: TestClient, fake_db, fake_films):
+    titles = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/films?limit=4&cursor={cursor}')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['total'] is None
+        assert data['total_exact'] is None
+        titles.extend(film['title'] for film in data['films'])
+        cursor = data['next_cursor']
+
+    assert titles == [f'film #{x}' for x in range(10)]
+
+
+def test_films_cursor_with_query(client: TestClient, fake_db, fake_films):
+    response = client.get('/api/films?q=%232&cursor=')
+
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert [film['title'] for film in data['films']] == ['film #2']
+    assert data['next_cursor'] is None
+
+
+def test_reviews_cursor_pagination(client: TestClient, fake_db, fake_reviews):
+    response = client.get('/api/films/1/reviews?limit=3&cursor=')
+    data = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert data['offset'] is None
+    assert [x['text'] for x in data['reviews']] == [
+        f'test review #{x}' for x in range(3)
+    ]
+
+    cursor = data['next_cursor']
+    response = client.get(f'/api/films/1/reviews?limit=3&cursor={cursor}')
+    data = response.json()
+
+    assert [x['text'] for x in data['reviews']] == [
+        f'test review #{x}' for x in range(3, 6)
+    ]
+
+
+def test_invalid_cursor(client: TestClient, fake_db, fake_reviews):
+    films = client.get('/api/films?cursor=not-a-cursor')
+    reviews = client.get('/api/films/1/reviews?cursor=WzEsMl0')  # [1,2]
+    wrong_id = client.get(f'/api/films?cursor={encode_cursor({})}')
+    wrong_review_id = client.get(
+        '/api/films/1/reviews?cursor='
+        + encode_cursor('2022-04-15T10:44:55', [1])
+    )
+
+    assert films.status_code == HTTPStatus.BAD_REQUEST
+    assert reviews.status_code == HTTPStatus.BAD_REQUEST
+    assert wrong_id.status_code == HTTPStatus.BAD_REQUEST
+    assert wrong_review_id.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_listing_rows_match_models(
+    client: TestClient, fake_db, fake_users, fake_reviews
+):
+    film = client.get('/api/films?limit=1').json()['films'][0]
+    review = client.get('/api/films/1/reviews?limit=1').json()['reviews'][0]
+
+    assert response_models.FilmModel.parse_obj(film).dict() == film
+    assert film['score'] == 9.0
+    assert set(review) == set(response_models.ReviewModel.__fields__)
+    assert review['author'] == {
+        'id': fake_users[0].id,
+        'login': fake_users[0].login,
+    }
+    assert response_models.ReviewModel.parse_obj(review).text == review['text']
+
+
+def test_film_page(client: TestClient, fake_db, fake_films, fake_reviews):
+    page = client.get('/api/films/1/page').json()
+    reviews = client.get('/api/films/1/reviews?limit=5').json()['reviews']
+
+    assert page['film'] == client.get('/api/films/1').json()
+    assert page['score'] == 9.0
+    assert page['reviews'] == reviews
+    assert response_models.FilmInfoModel.parse_obj(page).dict()['reviews']
+
+    page = client.get(f'/api/films/{fake_films[9].id}/page?reviews=2').json()
+    assert page['reviews'] == []
+    assert page['score'] is None
+    assert page['film']['evaluators'] == 0
+
+    assert len(client.get('/api/films/1/page?reviews=0').json()['reviews']) == 0
+    assert client.get('/api/films/666/page').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get('/api/films/1/page?reviews=51').status_code == (
+        HTTPStatus.UNPROCESSABLE_ENTITY
+    )
+
+
+def test_ndjson_export(client: TestClient, fake_db, fake_films, fake_reviews):
+    total = client.get('/api/films').json()['total']
+    response = client.get('/api/films?format=ndjson')
+    films = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert len(films) == total
+    assert films[0]['title'] == 'film #0'
+    assert [x['id'] for x in films] == sorted(x['id'] for x in films)
+
+    response = client.get('/api/films/1/reviews?format=ndjson')
+    reviews = [json.loads(line) for line in response.text.splitlines()]
+
+    assert len(reviews) == client.get('/api/films/1/reviews').json()['total']
+    assert reviews[0]['author']['login'] == 'test_user_0'
+
+
+def test_unknown_format(client: TestClient, fake_db):
+    response = client.get('/api/films?format=xml')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
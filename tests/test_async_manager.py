@@ -0,0 +1,104 @@
+import asyncio
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from onlyfilms import async_manager, auth, hashing
+
+
+def test_async_get_film_rows(fake_db, fake_films):
+    result, total = asyncio.run(async_manager.get_film_rows(limit=3))
+
+    assert total == (10, True)
+    assert [film.title for film in result] == [
+        'film #0',
+        'film #1',
+        'film #2',
+    ]
+
+
+def test_async_wrapper_with_session(
+    mocker: MockerFixture, fake_db, test_async_db
+):
+    fake_function_mock = mocker.Mock(return_value='result')
+    orm_func = async_manager.async_orm_function(fake_function_mock)
+
+    async def run():
+        async with test_async_db() as session:
+            return await orm_func(1, test='test', session=session)
+
+    assert asyncio.run(run()) == 'result'
+    fake_function_mock.assert_called_once()
+    assert fake_function_mock.call_args.args == (1,)
+
+
+def test_async_register_and_login(
+    mocker: MockerFixture, fake_db, unregister_user
+):
+    login, password = unregister_user['login'], unregister_user['password']
+    # the password is checked without blocking the event loop
+    check = mocker.spy(hashing.hasher, 'check_async')
+    blocking = mocker.spy(hashing.hasher, 'check')
+
+    async def run():
+        registered = await async_manager.regster_user(login, password)
+        wrong = await async_manager.login_user(login, 'wrong password')
+        token = await async_manager.login_user(login, password)
+        return registered, wrong, token
+
+    registered, wrong, token = asyncio.run(run())
+
+    assert registered
+    assert wrong is None
+    assert token is not None
+    assert check.call_count == 2
+    blocking.assert_not_called()
+
+
+def request_delta(client: TestClient, *args, **kwargs):
+    before = async_manager.request_stats.snapshot()
+    response = client.get(*args, **kwargs)
+    after = async_manager.request_stats.snapshot()
+    assert response.status_code == HTTPStatus.OK
+    return {name: after[name] - before[name] for name in after}
+
+
+def test_request_shares_one_session(
+    client: TestClient,
+    fake_db,
+    fake_films,
+    fake_reviews,
+    valid_user_token,
+    clear_response_cache,
+):
+    auth.forget_token(valid_user_token)
+    delta = request_delta(
+        client,
+        f'/onlyfilms/film/{fake_films[1].id}',
+        cookies={'token': valid_user_token},
+    )
+
+    assert delta['requests'] == 1
+    assert delta['sessions'] == 1
+    # the token lookup and the film page query
+    assert delta['statements'] == 2
+
+    delta = request_delta(client, '/api/films/1/reviews?format=ndjson')
+    assert delta['sessions'] == 1
+
+
+def test_request_session(fake_db):
+    assert async_manager.request_scope.get() is None
+
+    async def run():
+        async for scope in async_manager.request_session():
+            session = scope.get_session()
+            assert scope.get_session() is session
+            assert async_manager.request_scope.get() is scope
+        return scope
+
+    scope = asyncio.run(run())
+    assert scope.session is None
+    assert scope.sessions == 1
+    assert async_manager.request_scope.get() is None
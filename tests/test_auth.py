@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+from sqlalchemy.exc import OperationalError
+
+from onlyfilms import async_manager, auth, manager
+from onlyfilms.models.orm import Token, User
+from onlyfilms.settings import settings
+
+
+def test_resolve_token_is_cached(
+    mocker: MockerFixture, fake_db, fake_users, fake_users_tokens
+):
+    token: Token = fake_users_tokens[3]
+    auth.forget_token(token.token)
+    lookup = mocker.spy(manager, 'get_token')
+
+    first = asyncio.run(auth.resolve_token_async(token.token))
+    second = asyncio.run(auth.resolve_token_async(token.token))
+
+    assert first == second == auth.AuthUser(fake_users[3].id, 'test_user_3')
+    lookup.assert_called_once()
+
+
+def test_expired_token(test_db, fake_db, fake_users):
+    with test_db() as session:
+        token = Token(session.get(User, fake_users[4].id))
+        token.created = datetime.datetime.now() - Token.EXPIRE
+        session.add(token)
+        session.commit()
+
+    assert asyncio.run(auth.resolve_token_async(token.token)) is None
+    assert asyncio.run(auth.resolve_token_async(None)) is None
+
+
+def test_logout(client: TestClient, test_db, fake_db, fake_users):
+    with test_db() as session:
+        token = Token(session.get(User, fake_users[5].id)).token
+        session.commit()
+
+    header = {'authorization': token}
+    assert asyncio.run(auth.resolve_token_async(token)) is not None
+
+    response = client.post('/api/logout', headers=header)
+
+    assert response.status_code == HTTPStatus.OK
+    assert asyncio.run(auth.resolve_token_async(token)) is None
+    assert client.post('/api/logout', headers=header).status_code == (
+        HTTPStatus.FORBIDDEN
+    )
+    assert not asyncio.run(auth.logout_async(None))
+
+
+def user_tokens(test_db, user_id):
+    with test_db() as session:
+        return {
+            token
+            for token, in session.query(Token.token).filter(
+                Token.user_id == user_id
+            )
+        }
+
+
+def test_purge_expired_tokens(test_db, fake_db, fake_users):
+    user_id = fake_users[6].id
+    with test_db() as session:
+        user = session.get(User, user_id)
+        expired = [Token(user) for _ in range(5)]
+        for token in expired:
+            token.created = datetime.datetime.now() - Token.EXPIRE
+        live = Token(user)
+        session.add_all(expired + [live])
+        session.commit()
+
+    assert manager.purge_expired_tokens(batch_size=2) >= 5
+    remaining = user_tokens(test_db, user_id)
+    assert live.token in remaining
+    assert not remaining & {token.token for token in expired}
+    assert manager.purge_expired_tokens() == 0
+
+
+def test_tokens_per_user_cap(
+    mocker: MockerFixture, test_db, fake_db, fake_users
+):
+    mocker.patch.object(settings, 'token_max_per_user', 2)
+    user_id = fake_users[7].id
+    with test_db() as session:
+        user = session.get(User, user_id)
+        tokens = [manager.create_token(user, session=session) for _ in range(4)]
+
+    assert user_tokens(test_db, user_id) == set(tokens[-2:])
+    assert manager.get_token(tokens[0]) is None
+    assert manager.get_token(tokens[-1]).user_id == user_id
+
+
+def test_trimmed_token_is_rejected(
+    mocker: MockerFixture, client: TestClient, fake_db, unregister_user
+):
+    mocker.patch.object(settings, 'token_max_per_user', 1)
+    # a user of its own, the session token of test_user stays valid
+    response = client.post('/api/register', json=unregister_user)
+    assert response.status_code == HTTPStatus.ACCEPTED
+
+    def login() -> str:
+        response = client.post('/api/login', json=unregister_user)
+        assert response.status_code == HTTPStatus.ACCEPTED
+        return response.json()['token']
+
+    first = login()
+    assert asyncio.run(auth.resolve_token_async(first)) is not None
+    second = login()
+
+    assert asyncio.run(auth.resolve_token_async(first)) is None
+    assert asyncio.run(auth.resolve_token_async(second)) is not None
+
+
+def test_token_sweeper(mocker: MockerFixture):
+    purge = mocker.patch.object(
+        async_manager, 'purge_expired_tokens', return_value=3
+    )
+    sweeper = auth.TokenSweeper(0.01, 50)
+    disabled = auth.TokenSweeper(0, 50)
+
+    async def run():
+        await sweeper.start()
+        await asyncio.sleep(0.05)
+        await sweeper.stop()
+        await disabled.start()
+        await disabled.stop()
+
+    asyncio.run(run())
+
+    assert purge.await_count >= 2
+    purge.assert_awaited_with(50)
+    assert sweeper.task is None
+    assert disabled.task is None
+
+    purge.side_effect = OperationalError('DELETE', {}, Exception('locked'))
+    assert asyncio.run(sweeper.purge()) == 0
@@ -0,0 +1,111 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from onlyfilms.cache import (
+    CacheBackend,
+    LRUCache,
+    MemoryBackend,
+    RedisBackend,
+    create_backend,
+)
+
+
+def test_lru_eviction():
+    cache: LRUCache[int] = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_ttl_expiry(mocker: MockerFixture):
+    clock = mocker.patch('onlyfilms.cache.time.monotonic', return_value=100.0)
+    cache: LRUCache[str] = LRUCache(maxsize=10, ttl=5)
+    cache.set('short', 'value', ttl=1)
+    cache.set('long', 'value')
+
+    clock.return_value = 102.0
+
+    assert cache.get('short') is None
+    assert cache.get('long') == 'value'
+    assert len(cache) == 1
+
+
+def test_stats_and_delete():
+    cache: LRUCache[str] = LRUCache(maxsize=10, ttl=5)
+    cache.set('key', 'value')
+    cache.get('key')
+    cache.delete('key')
+    cache.get('key')
+    cache.set('other', 'value')
+    cache.clear()
+
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 0, 'maxsize': 10}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def pipeline(self):
+        return self
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+
+    def execute(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    'backend',
+    [MemoryBackend(maxsize=10, ttl=60), RedisBackend(FakeRedis(), ttl=60)],
+)
+def test_cache_backend(backend: CacheBackend):
+    assert backend.get('key') is None
+    assert backend.version('films') == 0
+
+    backend.set('key', {'value': [1, 2]})
+    backend.bump('films', 'film:1')
+    backend.bump('films')
+
+    assert backend.get('key') == {'value': [1, 2]}
+    assert backend.version('films') == 2
+    assert backend.version('film:1') == 1
+    assert backend.version('film:2') == 0
+
+
+def test_memory_backend_evicts_versions():
+    backend = MemoryBackend(maxsize=2, ttl=60)
+    backend.bump('film:1', 'film:1', 'film:2')
+    backend.version('film:1')
+    backend.bump('film:3')
+
+    # film:2 was evicted, names without a version read its last one
+    assert backend.version('film:2') == 1
+    assert backend.version('film:4') == 1
+    assert backend.version('film:1') == 2
+
+    backend.bump('film:4', 'film:5')
+
+    assert backend.version('film:1') == 2
+    assert backend.version('film:4') == 2
+    assert backend.version('film:3') == 2
+
+
+def test_unknown_cache_backend():
+    assert isinstance(create_backend('memory://', 10, 60), MemoryBackend)
+    with pytest.raises(ValueError):
+        create_backend('memcached://localhost', 10, 60)
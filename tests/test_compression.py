@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from onlyfilms import compression
+from onlyfilms.compression import CompressionMiddleware
+
+TEXT = 'onlyfilms ' * 200
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get('/large')
+    def large() -> Response:
+        return PlainTextResponse(TEXT)
+
+    @app.get('/small')
+    def small() -> Response:
+        return PlainTextResponse('small')
+
+    @app.get('/encoded')
+    def encoded() -> Response:
+        body = gzip.compress(TEXT.encode())
+        return Response(body, headers={'Content-Encoding': 'gzip'})
+
+    @app.get('/stream')
+    def stream() -> Response:
+        chunks = (f'line {x}\n'.encode() for x in range(1000))
+        return StreamingResponse(chunks, media_type='text/plain')
+
+    return TestClient(app)
+
+
+def raw(client: TestClient, url: str, encoding: str):
+    return client.get(url, headers={'Accept-Encoding': encoding}, stream=True)
+
+
+@pytest.mark.parametrize(
+    'accept, encoding, decompress',
+    [
+        pytest.param(
+            'gzip, deflate, br',
+            'br',
+            lambda body: compression.brotli.decompress(body),
+            marks=pytest.mark.skipif(
+                compression.brotli is None, reason='brotli is not installed'
+            ),
+        ),
+        ('gzip;q=1.0', 'gzip', gzip.decompress),
+    ],
+)
+def test_compressed(client: TestClient, accept, encoding, decompress):
+    response = raw(client, '/large', accept)
+    body = response.raw.read(decode_content=False)
+
+    assert response.headers['content-encoding'] == encoding
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert int(response.headers['content-length']) == len(body) < len(TEXT)
+    assert decompress(body).decode() == TEXT
+
+
+def test_gzip_without_brotli(mocker: MockerFixture, client: TestClient):
+    mocker.patch.object(compression, 'brotli', None)
+
+    response = client.get('/large', headers={'Accept-Encoding': 'br, gzip'})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.text == TEXT
+
+
+@pytest.mark.parametrize(
+    'url, accept', [('/small', 'gzip'), ('/large', 'identity')]
+)
+def test_uncompressed(client: TestClient, url, accept):
+    response = client.get(url, headers={'Accept-Encoding': accept})
+
+    assert 'content-encoding' not in response.headers
+
+
+def test_already_encoded(client: TestClient):
+    response = raw(client, '/encoded', 'br')
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert (
+        gzip.decompress(response.raw.read(decode_content=False)).decode()
+        == TEXT
+    )
+
+
+def test_streamed(client: TestClient):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    assert response.text.splitlines()[-1] == 'line 999'
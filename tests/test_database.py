@@ -0,0 +1,115 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from onlyfilms import LazySessionMaker
+from onlyfilms.app import create_app
+from onlyfilms.database import (
+    async_url,
+    create_db_engine,
+    dispose_after_fork,
+    engine_options,
+)
+from onlyfilms.settings import Settings
+
+
+@pytest.mark.parametrize(
+    'url, expected',
+    [
+        ('sqlite:///films.db', 'sqlite+aiosqlite:///films.db'),
+        ('postgresql://user@db/films', 'postgresql+asyncpg://user@db/films'),
+        (
+            'postgresql+psycopg2://user@db/films',
+            'postgresql+asyncpg://user@db/films',
+        ),
+    ],
+)
+def test_async_url(url, expected):
+    assert async_url(url) == expected
+
+
+def test_async_url_unsupported():
+    with pytest.raises(ValueError):
+        async_url('oracle://db')
+
+
+def test_postgres_engine_options():
+    settings = Settings(
+        database_url='postgresql://db/films',
+        pool_size=20,
+        pool_pre_ping=True,
+        statement_timeout=1.5,
+    )
+
+    options = engine_options(settings.database_url, settings, False)
+    async_options = engine_options(
+        async_url(settings.database_url), settings, True
+    )
+
+    assert options['poolclass'] is QueuePool
+    assert options['pool_size'] == 20
+    assert options['pool_pre_ping']
+    assert options['connect_args'] == {'options': '-c statement_timeout=1500'}
+    assert async_options['connect_args'] == {
+        'server_settings': {'statement_timeout': '1500'}
+    }
+
+
+def test_memory_sqlite_engine():
+    engine = create_db_engine(Settings(database_url='sqlite://'))
+
+    assert isinstance(engine.pool, StaticPool)
+
+
+def test_sqlite_pragmas(tmp_path):
+    settings = Settings(
+        database_url=f'sqlite:///{tmp_path / "pragmas.db"}',
+        sqlite_busy_timeout=1234,
+    )
+    engine = create_db_engine(settings)
+
+    with engine.connect() as connection:
+        pragma = connection.exec_driver_sql
+        assert pragma('PRAGMA journal_mode').scalar() == 'wal'
+        assert pragma('PRAGMA synchronous').scalar() == 1  # NORMAL
+        assert pragma('PRAGMA busy_timeout').scalar() == 1234
+    assert isinstance(engine.pool, QueuePool)
+    engine.dispose()
+
+
+def test_app_shutdown_disposes_async_engine(mocker):
+    engine = mocker.patch('onlyfilms.app.get_async_engine').return_value
+    dispose = engine.dispose = mocker.AsyncMock()
+
+    with TestClient(create_app()):
+        dispose.assert_not_called()
+
+    dispose.assert_called_once()
+
+
+def test_dispose_after_fork(mocker, tmp_path):
+    register = mocker.patch('os.register_at_fork')
+    engine = create_db_engine(
+        Settings(database_url=f'sqlite:///{tmp_path / "fork.db"}')
+    )
+    with engine.connect():
+        pass
+    dispose_after_fork(engine)
+
+    # the connection of the parent stays open, the child pool starts empty
+    connection = engine.pool._pool.queue[0]
+    register.call_args.kwargs['after_in_child']()
+    assert engine.pool.checkedin() == 0
+    assert connection.dbapi_connection is not None
+    engine.dispose()
+
+
+def test_lazy_session_maker(mocker):
+    engine = create_db_engine(Settings(database_url='sqlite://'))
+    get_bind = mocker.Mock(return_value=engine)
+    maker = LazySessionMaker(get_bind, expire_on_commit=False)
+    get_bind.assert_not_called()
+
+    with maker() as first, maker() as second:
+        assert first.bind is second.bind is engine
+    get_bind.assert_called_once()
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from onlyfilms import hashing
+from onlyfilms.hashing import HashingOverloaded, PasswordHasher
+from onlyfilms.models.orm import User
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_hash_and_check(workers):
+    hasher = PasswordHasher(workers, queue_limit=4, retry_after=1)
+
+    password_hash = hasher.hash('secret')
+
+    assert hasher.check('secret', password_hash)
+    assert not hasher.check('wrong', password_hash)
+    assert hasher.depth == 0
+    hasher.shutdown()
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_async_hash_and_check(workers):
+    hasher = PasswordHasher(workers, queue_limit=4, retry_after=1)
+
+    async def run():
+        password_hash = await hasher.hash_async('secret')
+        return await hasher.check_async('secret', password_hash)
+
+    assert asyncio.run(run())
+    hasher.shutdown()
+
+
+def test_async_without_workers_leaves_the_loop(mocker: MockerFixture):
+    threads = []
+
+    def check(*_):
+        threads.append(threading.get_ident())
+        return True
+
+    mocker.patch.object(hashing, 'check_password', side_effect=check)
+    hasher = PasswordHasher(0, queue_limit=4, retry_after=1)
+
+    async def run():
+        return await hasher.check_async('secret', b''), threading.get_ident()
+
+    checked, loop_thread = asyncio.run(run())
+
+    assert checked
+    assert len(threads) == 1 and threads[0] != loop_thread
+
+
+def test_queue_limit():
+    hasher = PasswordHasher(1, queue_limit=1, retry_after=7)
+    release = threading.Event()
+    busy = hasher._submit(release.wait)
+
+    with pytest.raises(HashingOverloaded) as error:
+        hasher.hash('secret')
+
+    release.set()
+    busy.result()
+    hasher.shutdown()
+
+    assert error.value.retry_after == 7
+    assert hasher.depth == 0
+
+
+def test_configurable_rounds():
+    password_hash = hashing.hash_password('secret', rounds=5)
+
+    assert password_hash.startswith(b'$2b$05$')
+    assert User('login', password='secret').check_password('secret')
+
+
+def test_overloaded_login(
+    mocker: MockerFixture, client: TestClient, fake_db, register_user
+):
+    hasher = PasswordHasher(1, queue_limit=0, retry_after=3)
+    mocker.patch.object(hashing, 'hasher', hasher)
+
+    response = client.post('/api/login', json=register_user)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['retry-after'] == '3'
@@ -0,0 +1,187 @@
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.exc import OperationalError
+
+from onlyfilms import importer, manager
+from onlyfilms.models.orm import Film
+
+
+@pytest.fixture
+def imported_films(test_db, fake_db):
+    yield
+    with test_db() as session:
+        session.query(Film).filter(Film.title.like('imported%')).delete(
+            synchronize_session=False
+        )
+        session.commit()
+
+
+def imported(test_db):
+    with test_db() as session:
+        return dict(
+            session.query(Film.external_id, Film.title).filter(
+                Film.title.like('imported%')
+            )
+        )
+
+
+def test_import_csv(tmp_path, test_db, imported_films):
+    path = tmp_path / 'films.csv'
+    path.write_text(
+        'external_id,title,director,description,cover\n'
+        'tt1,imported heat,Michael Mann,,\n'
+        'tt2,,nobody,,\n'
+        ',imported alien,Ridley Scott,"a ""quoted"", text",\n'
+    )
+
+    result = importer.import_films(path)
+
+    assert result == importer.ImportResult(2, 0, 1, 0)
+    assert imported(test_db) == {'tt1': 'imported heat', None: 'imported alien'}
+    assert not importer.progress_path(path).exists()
+
+
+def test_import_jsonl_upsert(tmp_path, test_db, imported_films):
+    path = tmp_path / 'films.jsonl'
+    rows = [
+        {'external_id': 'a', 'title': 'imported a'},
+        {'external_id': 'b', 'title': 'imported b'},
+    ]
+    path.write_text('\n'.join(json.dumps(row) for row in rows))
+    importer.import_films(path)
+
+    rows = [
+        {'external_id': 'b', 'title': 'imported old b'},
+        {'external_id': 'b', 'title': 'imported new b'},
+        {'external_id': 'c', 'title': 'imported c'},
+    ]
+    path.write_text(
+        '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n\n'
+    )
+    result = importer.import_films(path, batch_size=10)
+
+    assert result == importer.ImportResult(1, 1, 1, 0)
+    assert imported(test_db) == {
+        'a': 'imported a',
+        'b': 'imported new b',
+        'c': 'imported c',
+    }
+
+
+def test_import_partial_update(tmp_path, test_db, imported_films):
+    path = tmp_path / 'films.jsonl'
+    path.write_text(
+        json.dumps(
+            {'external_id': 'p', 'title': 'imported p', 'director': 'Someone'}
+        )
+    )
+    importer.import_films(path)
+
+    path.write_text(json.dumps({'external_id': 'p', 'title': 'imported q'}))
+    result = importer.import_films(path)
+
+    assert result == importer.ImportResult(0, 1, 0, 0)
+    with test_db() as session:
+        film = session.query(Film).filter(Film.external_id == 'p').one()
+        assert (film.title, film.director) == ('imported q', 'Someone')
+
+
+def test_import_rejects_duplicates(tmp_path, test_db, imported_films):
+    path = tmp_path / 'films.csv'
+    path.write_text('external_id,title\nd1,imported d1\n')
+    importer.import_films(path)
+
+    path.write_text(
+        'external_id,title\n'
+        'd1,imported again\n'
+        'd2,imported d2\n'
+        'd2,imported d2 again\n'
+        'd3,imported d3\n'
+    )
+    result = importer.import_films(path, batch_size=10, upsert=False)
+
+    assert result == importer.ImportResult(2, 0, 2, 0)
+    assert imported(test_db) == {
+        'd1': 'imported d1',
+        'd2': 'imported d2',
+        'd3': 'imported d3',
+    }
+    assert not importer.progress_path(path).exists()
+
+
+def test_import_resume(
+    mocker: MockerFixture, tmp_path, test_db, imported_films
+):
+    path = tmp_path / 'films.csv'
+    path.write_text(
+        'external_id,title\n'
+        + ''.join(f'r{x},imported #{x}\n' for x in range(5))
+    )
+    import_batch = manager.import_films
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise OperationalError('INSERT', {}, Exception('disk I/O error'))
+        return import_batch(*args, **kwargs)
+
+    mocker.patch.object(manager, 'import_films', side_effect=failing)
+
+    with pytest.raises(OperationalError):
+        importer.import_films(path, batch_size=2)
+
+    assert importer.read_progress(importer.progress_path(path)) == 3
+    assert len(imported(test_db)) == 2
+
+    result = importer.import_films(path, batch_size=2)
+
+    assert result == importer.ImportResult(3, 0, 0, 3)
+    assert len(imported(test_db)) == 5
+    assert not importer.progress_path(path).exists()
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        importer.import_films(tmp_path / 'films.xml')
+
+    assert importer.detect_format(tmp_path / 'films.txt', 'csv') == 'csv'
+    with pytest.raises(ValueError):
+        importer.detect_format(tmp_path / 'films.txt')
+    with pytest.raises(ValueError):
+        importer.detect_format(tmp_path / 'films.csv', 'xml')
+
+
+def test_import_reviews(tmp_path, test_db, fake_users, imported_films):
+    films = tmp_path / 'films.csv'
+    films.write_text('external_id,title\nrv1,imported reviewed\n')
+    importer.import_films(films)
+
+    path = tmp_path / 'reviews.jsonl'
+    rows = [
+        {
+            'author': fake_users[2].login,
+            'film_external_id': 'rv1',
+            'text': 'old review',
+            'score': 7,
+            'created': '2001-05-01T10:00:00',
+        },
+        {'author': fake_users[2].login, 'film_external_id': 'rv1'},
+        {'author': 'nobody_here', 'film_external_id': 'rv1'},
+        {'author': fake_users[3].login, 'film_id': 666},
+        {'author': fake_users[3].login},
+    ]
+    path.write_text('\n'.join(json.dumps(row) for row in rows))
+
+    result = importer.import_reviews(path, batch_size=2)
+
+    assert result == importer.ImportResult(1, 0, 4, 0)
+    with test_db() as session:
+        film = session.query(Film).filter(Film.external_id == 'rv1').one()
+        (review,) = film.reviews
+        assert review.created.year == 2001
+        assert film.score_sum == 7
+        session.delete(review)
+        session.commit()
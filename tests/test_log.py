@@ -0,0 +1,145 @@
+import io
+import logging
+import os
+import threading
+import time
+
+import orjson
+import pytest
+
+from onlyfilms.log import (
+    BufferedHandler,
+    JsonFormatter,
+    SamplingFilter,
+    parse_sampling,
+)
+
+
+def record(message: str, *args, level: int = logging.INFO, name='onlyfilms'):
+    return logging.LogRecord(name, level, __file__, 1, message, args, None)
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+def lines(stream: io.StringIO):
+    return [orjson.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_output(stream):
+    handler = BufferedHandler(stream, capacity=10, sampling='')
+    handler.setFormatter(JsonFormatter())
+    log = logging.getLogger('test_json_output')
+    log.addHandler(handler)
+    log.propagate = False
+
+    log.warning(
+        'review %s',
+        'x' * 5000,
+        extra={'film_id': 3, 'color_message': 'review \x1b[1m%s\x1b[0m'},
+    )
+    try:
+        raise ValueError('broken')
+    except ValueError:
+        log.exception('failed')
+    handler.close()
+    log.removeHandler(handler)
+
+    review, failure = lines(stream)
+    assert review['level'] == 'WARNING'
+    assert review['logger'] == 'test_json_output'
+    assert review['film_id'] == 3
+    assert 'color_message' not in review
+    assert review['message'].startswith('review xxx')
+    assert review['message'].endswith('... (5000 chars)')
+    assert len(review['message']) < 1100
+    assert failure['message'] == 'failed'
+    assert 'ValueError: broken' in failure['exception']
+
+
+def test_full_queue_drops(stream):
+    handler = BufferedHandler(stream, capacity=1, sampling='')
+    # a closed handler starts no writer thread, so nothing leaves the queue
+    handler.close()
+
+    for x in range(3):
+        handler.handle(record('line %d', x))
+
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().getMessage() == 'line 0'
+
+
+def test_close_full_queue():
+    written = []
+    unblocked = threading.Event()
+
+    class SlowStream(io.StringIO):
+        def write(self, text: str) -> int:
+            unblocked.wait()
+            written.append(text)
+            return len(text)
+
+    handler = BufferedHandler(SlowStream(), capacity=1, sampling='')
+    handled = 0
+    while not handler.dropped:
+        handler.handle(record('line'))
+        handled += 1
+    threading.Timer(0.05, unblocked.set).start()
+    handler.close()
+
+    assert len(written) == handled - 1
+
+
+def test_forked_child_writes(tmp_path):
+    path = tmp_path / 'log'
+    with open(path, 'w', encoding='utf-8') as stream:
+        handler = BufferedHandler(stream, capacity=10, sampling='')
+        handler.handle(record('parent'))
+        while not path.read_text():
+            time.sleep(0.01)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                handler.handle(record('child'))
+                handler.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        handler.close()
+
+    assert path.read_text().splitlines() == ['parent', 'child']
+
+
+def test_sampling():
+    sampler = SamplingFilter(parse_sampling('onlyfilms:3,uvicorn.access:2'))
+
+    kept = [
+        sampler.filter(record('hit %d', x, name='onlyfilms.api'))
+        for x in range(6)
+    ]
+    assert kept == [True, False, False, True, False, False]
+    assert sampler.filter(record('other message'))
+    assert sampler.filter(record('hit', level=logging.WARNING))
+    assert sampler.filter(record('access', name='uvicorn.access'))
+    assert not sampler.filter(record('access', name='uvicorn.access'))
+    assert sampler.filter(record('access', name='other'))
+
+
+def test_sampling_handler(stream):
+    handler = BufferedHandler(stream, capacity=10, sampling='root:2')
+    for x in range(4):
+        handler.handle(record('line %d', x, name='some.logger'))
+    handler.close()
+
+    assert stream.getvalue().splitlines() == ['line 0', 'line 2']
+
+
+def test_parse_sampling():
+    assert parse_sampling('') == {}
+    assert parse_sampling(' a.b:10, c:1 ') == {'a.b': 10, 'c': 1}
+    for sampling in ['a', 'a:', ':3', 'a:0', 'a:x']:
+        with pytest.raises(ValueError):
+            parse_sampling(sampling)
@@ -1,15 +1,51 @@
 from http import HTTPStatus
 
 from pytest_mock import MockerFixture
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
 from onlyfilms import manager
+from onlyfilms.models import response_models
+from onlyfilms.models.orm import Film, Review, User
 
 
-def test_get_films(fake_db, fake_films):
-    result, total = manager.get_films()
+def test_get_film_rows(fake_db, fake_films):
+    result, total = manager.get_film_rows()
 
     assert len(result) == 10
-    assert total == 10
+    assert total == (10, True)
+
+
+def test_page_total_in_one_query(test_db, fake_db, fake_films, fake_reviews):
+    statements = []
+
+    def collect(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    engine = test_db.kw['bind']
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        films, total = manager.get_film_rows('', 2, 3)
+        reviews, review_total = manager.get_review_rows(fake_films[0].id, 2)
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
+
+    assert len(statements) == 2
+    assert [film.title for film in films] == ['film #2', 'film #3', 'film #4']
+    assert 'total' not in response_models.film_row(films[0])
+    assert total == (10, True)
+    assert [review.film_id for review in reviews] == [fake_films[0].id] * 2
+    assert review_total == (len(fake_reviews), True)
+
+
+def test_total_past_last_page(fake_db, fake_films, fake_reviews):
+    assert manager.get_film_rows(offset=50) == ([], (10, True))
+    assert manager.get_review_rows(fake_films[0].id, offset=50) == (
+        [],
+        (len(fake_reviews), True),
+    )
+    assert manager.get_review_rows(666) == ([], (0, True))
 
 
 def test_wrapper_with_session(mocker: MockerFixture, fake_db):
@@ -26,13 +62,13 @@ def test_wrapper_with_session(mocker: MockerFixture, fake_db):
 
 
 def test_get_film_score(fake_db, fake_reviews):
-    score = manager.get_film_score(1)
+    score = manager.get_film_by_id(1)[1]
 
     assert score == 9.0
 
 
-def test_get_user(fake_db, register_user):
-    user = manager.get_user(1)
+def test_get_user_by_login(fake_db, register_user):
+    user = manager.get_user_by_login(register_user['login'])
 
     assert user.login == register_user['login']
 
@@ -53,3 +89,65 @@ def test_delete_review(fake_db, test_db, fake_users, deleted_review):
     deleted = manager.delete_review(review_id, author)
 
     assert deleted == review_id
+
+
+def test_review_changes_film_aggregates(
+    fake_db, test_db, fake_users, fake_films
+):
+    film_id = fake_films[7].id
+    with test_db() as session:
+        author = session.get(User, fake_users[1].id)
+        review = Review(author, session.get(Film, film_id), 'text', score=4)
+        session.add(review)
+        session.commit()
+        assert manager.get_film_by_id(film_id)[1:] == (4.0, 1)
+
+        review.score = 8
+        session.commit()
+        assert manager.get_film_by_id(film_id)[1:] == (8.0, 1)
+
+        session.delete(review)
+        session.commit()
+        assert manager.get_film_by_id(film_id)[1:] == (None, 0)
+
+
+def test_rebuild_film_aggregates(fake_db, test_db, fake_reviews):
+    with test_db() as session:
+        session.query(Film).filter(Film.id == 1).update(
+            {Film.score_sum: 0, Film.review_count: 100}
+        )
+        session.commit()
+
+    assert manager.rebuild_film_aggregates(verify_only=True) == 1
+    assert manager.rebuild_film_aggregates() == 1
+    assert manager.rebuild_film_aggregates(verify_only=True) == 0
+    assert manager.get_film_by_id(1)[1] == 9.0
+
+
+def test_post_reviews_conflict(fake_db, fake_reviews, fake_users):
+    statuses = manager.post_reviews(
+        [
+            manager.NewReview(fake_users[0].id, 1, 'second review'),
+            manager.NewReview(fake_users[0].id, 666, 'no film'),
+        ]
+    )
+
+    assert statuses == [
+        (HTTPStatus.CONFLICT, None),
+        (HTTPStatus.NOT_FOUND, None),
+    ]
+
+
+def test_post_reviews_failed_commit(
+    mocker: MockerFixture, fake_db, fake_films, fake_users
+):
+    mocker.patch.object(
+        Session, 'commit', side_effect=SQLAlchemyError('database is locked')
+    )
+
+    statuses = manager.post_reviews(
+        [manager.NewReview(fake_users[1].id, 9, 'lost review')]
+    )
+
+    assert statuses == [(HTTPStatus.BAD_REQUEST, None)]
+    assert manager.get_film_by_id(9)[2] == 0
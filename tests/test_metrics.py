@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from onlyfilms import logger, manager, metrics
+from onlyfilms.metrics import Counter, Gauge, Histogram, Registry
+from onlyfilms.settings import settings
+
+
+def test_render():
+    registry = Registry()
+    counter = Counter('requests_total', 'Requests', ('path',))
+    histogram = Histogram('latency', 'Latency', buckets=(0.1, 1.0))
+    registry.register(
+        counter,
+        histogram,
+        Gauge('depth', 'Depth', (), lambda: [((), 3)]),
+    )
+    counter.inc('/a"\n')
+    counter.inc('/a"\n', amount=2)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render().splitlines() == [
+        '# HELP requests_total Requests',
+        '# TYPE requests_total counter',
+        'requests_total{path="/a\\"\\n"} 3.0',
+        '# HELP latency Latency',
+        '# TYPE latency histogram',
+        'latency_bucket{le="0.1"} 0.0',
+        'latency_bucket{le="1.0"} 1.0',
+        'latency_bucket{le="+Inf"} 2.0',
+        'latency_sum 5.5',
+        'latency_count 2.0',
+        '# HELP depth Depth',
+        '# TYPE depth gauge',
+        'depth 3.0',
+    ]
+
+
+def samples(client: TestClient):
+    response = client.get('/metrics')
+    assert response.headers['content-type'].startswith(metrics.CONTENT_TYPE)
+    return {
+        line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+        for line in response.text.splitlines()
+        if not line.startswith('#')
+    }
+
+
+def test_metrics_endpoint(client: TestClient, fake_db, fake_films):
+    before = samples(client)
+    film_id = fake_films[0].id
+    client.get(f'/api/films/{film_id}')
+    client.get(f'/api/films/{film_id}')
+    client.get('/missing')
+    after = samples(client)
+
+    def change(name: str) -> float:
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    latency = 'onlyfilms_http_request_duration_seconds_count{method="GET",'
+    assert change(latency + 'route="/api/films/{film_id}",status="200"}') == 2
+    assert change(latency + 'route="<unmatched>",status="404"}') == 1
+    # the cached film and the first scrape run no statements, the 404 no
+    # dependencies
+    assert change('onlyfilms_request_db_statements_count') == 3
+    assert change('onlyfilms_request_db_statements_bucket{le="0.0"}') == 2
+    statements = 'onlyfilms_db_statements_total{function="get_film_by_id"}'
+    assert change(statements) == 1
+    assert 'onlyfilms_hashing_queue_depth' in after
+    assert 'onlyfilms_cache_hit_ratio{cache="response"}' in after
+
+
+def test_slow_query_log(mocker: MockerFixture, fake_db, fake_users):
+    warning = mocker.spy(logger, 'warning')
+    slow = metrics.slow_statements.values.get(('get_user_by_login',), 0)
+
+    manager.get_user_by_login(fake_users[0].login)
+    warning.assert_not_called()
+
+    mocker.patch.object(settings, 'slow_query_threshold', 1e-9)
+    manager.get_user_by_login(fake_users[0].login)
+
+    assert warning.call_args.args[1] == 'get_user_by_login'
+    assert metrics.slow_statements.values[('get_user_by_login',)] == slow + 1
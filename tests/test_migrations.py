@@ -0,0 +1,142 @@
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import event, inspect, select
+
+from onlyfilms import manager, migrations
+from onlyfilms.database import create_db_engine
+from onlyfilms.models.orm import Review
+from onlyfilms.settings import Settings
+
+LEGACY_SCHEMA = [
+    'CREATE TABLE users (id INTEGER PRIMARY KEY, login VARCHAR(25) NOT NULL '
+    'UNIQUE, password VARCHAR(128) NOT NULL, register_date DATE NOT NULL)',
+    'CREATE TABLE tokens (id INTEGER PRIMARY KEY, user_id INTEGER '
+    'REFERENCES users (id), created DATETIME NOT NULL, '
+    'token VARCHAR(128) UNIQUE)',
+    'CREATE TABLE films (id INTEGER PRIMARY KEY, title VARCHAR(120) NOT NULL, '
+    'director VARCHAR(50), description TEXT, cover VARCHAR(500))',
+    'CREATE TABLE reviews (id INTEGER PRIMARY KEY, author_id INTEGER '
+    'REFERENCES users (id), film_id INTEGER REFERENCES films (id), '
+    'created DATETIME NOT NULL, text TEXT, score INTEGER, '
+    'CONSTRAINT _user_review_unique UNIQUE (author_id, film_id))',
+    "INSERT INTO users VALUES (1, 'a', '', '2020-01-01'), "
+    "(2, 'b', '', '2020-01-01')",
+    "INSERT INTO films VALUES (1, 'Heat', 'Michael Mann', NULL, NULL)",
+    "INSERT INTO reviews VALUES (1, 1, 1, '2020-01-01', 'good', 8), "
+    "(2, 2, 1, '2020-01-02', 'no score', NULL)",
+]
+INDEXES = {
+    'reviews': {'ix_reviews_film_created', 'ix_reviews_film_score'},
+    'tokens': {'ix_tokens_token_created', 'ix_tokens_user_created'},
+    'films': {'ix_films_title'},
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(
+        Settings(database_url=f'sqlite:///{tmp_path / "migrations.db"}')
+    )
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine, table: str):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def applied(engine):
+    with engine.connect() as connection:
+        return migrations.applied_versions(connection)
+
+
+def test_new_database(engine):
+    assert migrations.migrate(engine) == []
+
+    assert applied(engine) == [x.version for x in migrations.MIGRATIONS]
+    for table, indexes in INDEXES.items():
+        assert indexes <= index_names(engine, table)
+    assert migrations.migrate(engine) == []
+
+
+def test_legacy_database(engine):
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+
+    assert migrations.migrate(engine) == migrations.MIGRATIONS
+
+    with engine.connect() as connection:
+        film = connection.exec_driver_sql(
+            'SELECT external_id, score_sum, score_count, review_count '
+            'FROM films'
+        ).one()
+        hits = connection.exec_driver_sql(
+            "SELECT rowid FROM films_fts WHERE films_fts MATCH 'mann'"
+        ).all()
+    assert tuple(film) == (None, 8, 1, 2)
+    assert hits == [(1,)]
+    for table, indexes in INDEXES.items():
+        assert indexes <= index_names(engine, table)
+    assert 'ix_films_external_id' in index_names(engine, 'films')
+    assert migrations.migrate(engine) == []
+
+
+def query_plans(engine, call) -> List[Tuple[str, List[str]]]:
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'DELETE')):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
+
+    with engine.connect() as connection:
+        return [
+            (
+                statement,
+                [
+                    row[3]
+                    for row in connection.exec_driver_sql(
+                        'EXPLAIN QUERY PLAN ' + statement, parameters
+                    )
+                ],
+            )
+            for statement, parameters in statements
+        ]
+
+
+def test_queries_use_indexes(test_db, fake_db, fake_users, fake_reviews):
+    film_id = fake_reviews[0].film_id
+    author_id = fake_users[0].id
+
+    def queries():
+        manager.get_film_rows()
+        manager.get_review_rows(film_id)
+        manager.get_film_by_id(film_id)
+        manager.get_film_page(film_id)
+        manager.get_user_by_login(fake_users[0].login)
+        manager.get_token('missing')
+        manager.create_token(fake_users[8])
+        manager.rebuild_film_aggregates(verify_only=True)
+        with test_db() as session:
+            session.execute(
+                select(Review.id).where(Review.author_id == author_id)
+            ).all()
+
+    plans = query_plans(test_db.kw['bind'], queries)
+
+    assert len(plans) >= 9
+    for statement, plan in plans:
+        for step in plan:
+            # older SQLite versions print SCAN TABLE <name>
+            words = step.replace('SCAN TABLE', 'SCAN').split()
+            table = words[1] if words[0] == 'SCAN' else None
+            assert table not in {'reviews', 'tokens', 'users'} or (
+                'INDEX' in step
+            ), f'{step} in {statement}'
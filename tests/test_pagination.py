@@ -0,0 +1,26 @@
+import pytest
+
+from onlyfilms.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('2022-04-15T10:44:55.241815', 42)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor, str, int) == ['2022-04-15T10:44:55.241815', 42]
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        '%%%',
+        'e30',
+        encode_cursor(1, 2),
+        encode_cursor('1'),
+        encode_cursor(True),
+        encode_cursor({}),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, int)
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import Session
+
+from onlyfilms import manager, response_cache
+from onlyfilms.models.orm import Film, Review
+
+
+def test_etag_not_modified(client: TestClient, fake_db, fake_films):
+    response = client.get('/api/films/2')
+    etag = response.headers['ETag']
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'Last-Modified' in response.headers
+
+    response = client.get('/api/films/2', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+    response = client.get('/api/films/2', headers={'If-None-Match': '"x"'})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_last_modified(client: TestClient, fake_db, fake_films):
+    response = client.get('/api/films')
+    modified = response.headers['Last-Modified']
+
+    response = client.get('/api/films', headers={'If-Modified-Since': modified})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(
+        '/api/films',
+        headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get('/api/films', headers={'If-Modified-Since': 'never'})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_cached_until_write(
+    mocker: MockerFixture,
+    client: TestClient,
+    test_db,
+    fake_db,
+    fake_films,
+    fake_users,
+):
+    get_film = mocker.patch.object(
+        manager, 'get_film_by_id', wraps=manager.get_film_by_id
+    )
+
+    first = client.get('/api/films/4').json()
+    assert client.get('/api/films/4').json() == first
+    assert get_film.call_count == 1
+
+    with test_db() as session:
+        session: Session
+        review = Review(fake_users[3], session.get(Film, 4), 'cached', 6)
+        session.add(review)
+        session.commit()
+
+    updated = client.get('/api/films/4').json()
+    assert get_film.call_count == 2
+    assert updated['evaluators'] == first['evaluators'] + 1
+
+    with test_db() as session:
+        session.delete(session.get(Review, review.id))
+        session.commit()
+
+
+def test_rollback_keeps_cache(test_db, fake_db, fake_films):
+    version = response_cache.backend.version(response_cache.film_version(3))
+
+    with test_db() as session:
+        session: Session
+        film = session.get(Film, 3)
+        film.description = 'rolled back'
+        session.flush()
+        session.rollback()
+
+    assert (
+        response_cache.backend.version(response_cache.film_version(3))
+        == version
+    )
@@ -0,0 +1,84 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from onlyfilms import manager, search
+from onlyfilms.settings import settings
+
+
+@pytest.mark.parametrize(
+    'text, expression',
+    [
+        ('film', '"film"*'),
+        ('#2', '"2"*'),
+        ('the "dark" knight', '"the"* "dark"* "knight"*'),
+        ('#!', None),
+    ],
+)
+def test_match_expression(text, expression):
+    assert search.match_expression(text) == expression
+
+
+@pytest.mark.parametrize('backend', ['like', 'fts5'])
+def test_capped_search_total(
+    mocker: MockerFixture, fake_db, fake_films, backend
+):
+    mocker.patch.object(search, 'DEFAULT_BACKEND', backend)
+    mocker.patch.object(settings, 'search_total_limit', 4)
+
+    films, total = manager.get_film_rows('film', limit=2)
+    assert len(films) == 2
+    assert total == (4, False)
+    assert manager.get_film_rows('film #3')[1] == (1, True)
+    assert manager.get_film_rows('film', offset=20)[1] == (4, False)
+
+    mocker.patch.object(settings, 'search_total_limit', 0)
+    assert manager.get_film_rows('film')[1] == (10, True)
+
+
+def test_prefix_search(fake_db, fake_films):
+    films, total = manager.get_film_rows('fil', limit=3)
+
+    assert total == (10, True)
+    assert [film.title for film in films] == [
+        'film #0',
+        'film #1',
+        'film #2',
+    ]
+
+
+def test_search_without_words(fake_db, fake_films):
+    films, total = manager.get_film_rows('#')
+
+    assert total == (10, True)
+    assert len(films) == 10
+
+
+def test_like_backend(mocker: MockerFixture, fake_db, fake_films):
+    mocker.patch.object(search, 'DEFAULT_BACKEND', 'like')
+
+    films, total = manager.get_film_rows('m #3')
+
+    assert total == (1, True)
+    assert films[0].title == 'film #3'
+
+
+def test_rebuild_search_index(fake_db, fake_films):
+    manager.rebuild_search_index()
+
+    films, total = manager.get_film_rows('film 7')
+
+    assert total == (1, True)
+    assert films[0].title == 'film #7'
+
+
+def test_rebuild_keeps_open_connections(test_db, fake_db, fake_films):
+    with test_db.kw['bind'].connect() as connection:
+        with test_db(bind=connection) as session:
+            manager.get_film_rows('film', session=session)
+
+        manager.rebuild_search_index()
+
+        with test_db(bind=connection) as session:
+            films, total = manager.get_film_rows('film 7', session=session)
+
+    assert total == (1, True)
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import uvicorn
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from onlyfilms import app, server, signed_tokens
+from onlyfilms.__main__ import args_parser
+from onlyfilms.settings import settings
+
+
+def test_start(mocker: MockerFixture):
+    serve = mocker.patch('onlyfilms.server.serve')
+    mocker.patch.dict(os.environ)
+    mocker.patch.object(settings, 'secret_key', None)
+    mocker.patch.object(settings, 'server_keep_alive', 7)
+    mocker.patch.object(settings, 'server_port', 8001)
+
+    result = CliRunner().invoke(
+        args_parser, ['start', '--workers', '3', '--port', '9000']
+    )
+
+    assert result.exit_code == 0, result.output
+    config, graceful_timeout = serve.call_args.args
+    assert (config.workers, config.port, config.timeout_keep_alive) == (
+        3,
+        9000,
+        7,
+    )
+    assert config.app == server.APP and config.factory
+    assert config.host == '127.0.0.1'
+    assert graceful_timeout is None
+    assert len(os.environ['ONLYFILMS_SECRET_KEY']) == 64
+
+
+def test_start_keeps_secret_key(mocker: MockerFixture):
+    serve = mocker.patch('onlyfilms.server.serve')
+    mocker.patch.dict(os.environ, {'WEB_CONCURRENCY': '2'})
+    os.environ.pop('ONLYFILMS_SECRET_KEY', None)
+    mocker.patch.object(settings, 'secret_key', 'shared')
+    mocker.patch.object(settings, 'server_graceful_timeout', 10)
+
+    result = CliRunner().invoke(args_parser, ['start'])
+
+    assert result.exit_code == 0, result.output
+    assert serve.call_args.args[0].workers == 2
+    assert serve.call_args.args[1] == 10
+    assert 'ONLYFILMS_SECRET_KEY' not in os.environ
+
+
+def test_start_refuses_local_revocation(mocker: MockerFixture):
+    serve = mocker.patch('onlyfilms.server.serve')
+    mocker.patch.dict(os.environ)
+    mocker.patch.object(settings, 'token_backend', 'signed')
+    mocker.patch.object(settings, 'response_cache_url', 'memory://')
+
+    result = CliRunner().invoke(args_parser, ['start', '--workers', '2'])
+    assert result.exit_code == 1
+    serve.assert_not_called()
+
+    result = CliRunner().invoke(args_parser, ['start', '--workers', '1'])
+    assert result.exit_code == 0
+    serve.assert_called_once()
+
+
+def test_serve(mocker: MockerFixture):
+    run = mocker.patch.object(server.GracefulServer, 'run')
+    multiprocess = mocker.patch('onlyfilms.server.Multiprocess')
+    bind = mocker.patch.object(uvicorn.Config, 'bind_socket')
+
+    server.serve(uvicorn.Config(server.APP, workers=1), None)
+    run.assert_called_once()
+    multiprocess.assert_not_called()
+
+    server.serve(uvicorn.Config(server.APP, workers=2), None)
+    multiprocess.assert_called_once()
+    assert multiprocess.call_args.kwargs['sockets'] == [bind.return_value]
+
+
+def test_graceful_timeout(mocker: MockerFixture):
+    graceful = server.GracefulServer(uvicorn.Config(server.APP), 0.05)
+    graceful.servers = []
+    # a connection that never finishes its response
+    graceful.server_state.connections.add(mocker.Mock())
+
+    asyncio.run(asyncio.wait_for(graceful.shutdown(), 5))
+
+    assert graceful.force_exit
+
+
+def test_signing_key_from_secret_key(mocker: MockerFixture):
+    mocker.patch.object(settings, 'token_signing_keys', None)
+    mocker.patch.object(settings, 'secret_key', 'shared')
+    token = signed_tokens.create_signer().issue(1, 'user')
+
+    assert token.split('.')[1] == 'derived'
+    assert signed_tokens.create_signer().verify(token) is not None
+
+
+def test_cli_imports(tmp_path: Path):
+    # runs from any directory and leaves the web stack to `start`
+    code = 'import sys, onlyfilms.__main__; print(*sys.modules)'
+    modules = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=tmp_path,
+        env={**os.environ, 'PYTHONPATH': str(Path(__file__).parents[1])},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+
+    assert 'onlyfilms.settings' in modules
+    heavy = {'fastapi', 'flask', 'uvicorn', 'sqlalchemy.ext.asyncio'}
+    assert not heavy & set(modules)
+
+
+def test_lazy_app():
+    assert app.app is not app.app
+    with pytest.raises(AttributeError):
+        app.missing
@@ -0,0 +1,129 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from onlyfilms import async_manager, auth, manager, signed_tokens
+from onlyfilms.cache import MemoryBackend
+from onlyfilms.settings import settings
+from onlyfilms.signed_tokens import Claims, TokenSigner
+
+
+def signer(*keys: str, lifetime: float = 60.0) -> TokenSigner:
+    return TokenSigner(
+        signed_tokens.parse_keys(','.join(keys)),
+        lifetime,
+        MemoryBackend(100, 60.0),
+    )
+
+
+def test_issue_and_verify():
+    tokens = signer('k1:secret')
+    token = tokens.issue(7, 'login.with:dots')
+
+    assert signed_tokens.is_signed(token)
+    claims = tokens.verify(token)
+    assert claims[:2] == (7, 'login.with:dots')
+    assert isinstance(claims, Claims)
+
+
+def test_rejected_tokens():
+    tokens = signer('k1:secret')
+    token = tokens.issue(7, 'user')
+    prefix, key_id, claims, digest = token.split('.')
+    forged = signer('k1:other').issue(1, 'admin').split('.')[2]
+
+    assert tokens.verify(f'{prefix}.{key_id}.{forged}.{digest}') is None
+    assert tokens.verify(f'{prefix}.k2.{claims}.{digest}') is None
+    assert tokens.verify(token + '.') is None
+    assert tokens.verify('not-a-token') is None
+    assert tokens.verify(signer('k1:secret', lifetime=-1).issue(7, 'x')) is None
+
+
+def test_broken_claims():
+    tokens = signer('k1:secret')
+    assert tokens.verify(tokens._sign('k1', b'secret', 'bm90IGpzb24')) is None
+    assert tokens.verify(tokens._sign('k1', b'secret', 'WzEsMl0')) is None
+
+
+def test_key_rotation():
+    old = signer('k1:old')
+    rotated = signer('k2:new', 'k1:old')
+    token = old.issue(3, 'user')
+
+    assert rotated.verify(token) == old.verify(token)
+    assert rotated.issue(3, 'user').split('.')[1] == 'k2'
+    assert signer('k2:new').verify(token) is None
+
+
+def test_revoke():
+    tokens = signer('k1:secret')
+    token = tokens.issue(7, 'user')
+    other = tokens.issue(7, 'user')
+
+    assert tokens.revoke(token)
+    assert tokens.verify(token) is None
+    assert tokens.verify(other) is not None
+    assert not tokens.revoke(token)
+
+
+def test_parse_keys():
+    assert signed_tokens.parse_keys('a:b:c, d:e') == [
+        ('a', b'b:c'),
+        ('d', b'e'),
+    ]
+    for keys in ['', 'nokey', ':secret', 'a.b:secret']:
+        with pytest.raises(ValueError):
+            signed_tokens.parse_keys(keys)
+    with pytest.raises(ValueError):
+        TokenSigner([], 60.0, MemoryBackend(1, 1.0))
+
+
+def test_create_signer(mocker: MockerFixture):
+    mocker.patch.object(settings, 'token_signing_keys', 'new:one,old:two')
+    assert signed_tokens.create_signer().key_id == 'new'
+
+
+def test_signed_login(
+    mocker: MockerFixture, client: TestClient, fake_db, register_user
+):
+    mocker.patch.object(settings, 'token_backend', 'signed')
+    lookup = mocker.spy(manager, 'get_token')
+
+    token = client.post('/api/login', json=register_user).json()['token']
+    header = {'authorization': token}
+
+    assert signed_tokens.is_signed(token)
+    assert (
+        asyncio.run(auth.resolve_token_async(token)).login
+        == register_user['login']
+    )
+    assert client.post('/api/logout', headers=header).status_code == (
+        HTTPStatus.OK
+    )
+    assert client.post('/api/logout', headers=header).status_code == (
+        HTTPStatus.FORBIDDEN
+    )
+    lookup.assert_not_called()
+
+    token = manager.login_user(**register_user)
+    assert asyncio.run(auth.logout_async(token))
+    assert not asyncio.run(auth.logout_async(token))
+    assert signed_tokens.is_signed(
+        asyncio.run(async_manager.login_user(**register_user))
+    )
+
+
+def test_signed_cookie(
+    mocker: MockerFixture, client: TestClient, fake_db, register_user
+):
+    mocker.patch.object(settings, 'token_backend', 'signed')
+
+    response = client.post(
+        '/onlyfilms/login', data=register_user, allow_redirects=False
+    )
+
+    assert signed_tokens.is_signed(response.cookies['token'])
+    client.cookies.clear()
@@ -0,0 +1,172 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from jinja2 import FileSystemBytecodeCache
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import Session
+
+from onlyfilms import manager
+from onlyfilms.app import create_app
+from onlyfilms.models.orm import Review
+from onlyfilms.view import app as view_app
+
+
+@pytest.fixture
+def client():
+    # redirects after login store the token cookie in the client
+    return TestClient(create_app())
+
+
+def test_index_page(client: TestClient, fake_db, fake_films):
+    response = client.get('/onlyfilms/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'href="film/1"' in response.text
+    assert 'Log in' in response.text
+
+    response = client.get('/onlyfilms/?query=%233')
+
+    assert 'href="film/4"' in response.text
+    assert 'href="film/1"' not in response.text
+
+
+def test_film_page(client: TestClient, fake_db, fake_reviews, valid_user_token):
+    response = client.get('/onlyfilms/film/1')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'test_user_0' in response.text
+    assert 'Sign in to leave a review' in response.text
+
+    response = client.get(
+        '/onlyfilms/film/1', cookies={'token': valid_user_token}
+    )
+
+    assert '[test_user]' in response.text
+    assert 'review-form' in response.text
+
+
+def test_not_found_page(client: TestClient, fake_db):
+    response = client.get('/onlyfilms/film/666')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'Can not found this page' in response.text
+
+
+def test_unmatched_page(client: TestClient):
+    response = client.get('/onlyfilms/missing')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'Can not found this page' in response.text
+
+    response = client.get('/api/missing')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Not Found'}
+
+
+def test_static(client: TestClient):
+    response = client.get('/onlyfilms/static/css/index_style.css')
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_login_page(client: TestClient, fake_db, register_user):
+    assert client.get('/onlyfilms/login').status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/onlyfilms/login', data=register_user, allow_redirects=False
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.headers['location'].endswith('/onlyfilms/')
+    assert response.cookies['token']
+
+    response = client.get(
+        '/onlyfilms/logout',
+        cookies={'token': response.cookies['token']},
+        allow_redirects=False,
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert 'token=""' in response.headers['set-cookie']
+
+
+def test_wrong_login(client: TestClient, fake_db, unregister_user):
+    response = client.post('/onlyfilms/login', data=unregister_user)
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+def test_register_page(client: TestClient, fake_db, unregister_user):
+    assert client.get('/onlyfilms/register').status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/onlyfilms/register', data=unregister_user, allow_redirects=False
+    )
+
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.cookies['token']
+
+    response = client.post('/onlyfilms/register', data=unregister_user)
+
+    assert response.text == 'wrong data'
+
+
+def test_film_review(client: TestClient, test_db, fake_db, valid_user_token):
+    response = client.post(
+        '/onlyfilms/film/3/review', data={'text': 'x'}, allow_redirects=False
+    )
+
+    assert response.headers['location'].endswith('/onlyfilms/login')
+
+    response = client.post(
+        '/onlyfilms/film/3/review',
+        data={'text': 'posted from the page'},
+        cookies={'token': valid_user_token},
+        allow_redirects=False,
+    )
+
+    assert response.headers['location'].endswith('/onlyfilms/film/3')
+    assert 'posted from the page' in client.get('/onlyfilms/film/3').text
+
+    with test_db() as session:
+        session: Session
+        for review in session.query(Review).filter(Review.film_id == 3):
+            session.delete(review)
+        session.commit()
+
+
+def test_cached_fragments(
+    mocker: MockerFixture, client: TestClient, fake_db, fake_films
+):
+    client.get('/onlyfilms/')
+    get_template = mocker.spy(view_app.templates, 'get_template')
+
+    response = client.get('/onlyfilms/')
+
+    assert 'href="film/1"' in response.text
+    assert [x.args[0] for x in get_template.call_args_list] == ['index.html']
+    assert isinstance(
+        view_app.templates.env.bytecode_cache, FileSystemBytecodeCache
+    )
+
+
+def test_fragments_follow_reviews(
+    client: TestClient, test_db, fake_db, fake_films, fake_users
+):
+    assert 'No reviews yet' in client.get('/onlyfilms/film/7').text
+
+    manager.post_review(7, fake_users[3], 'fresh fragment', 8)
+    response = client.get('/onlyfilms/film/7')
+
+    assert 'fresh fragment' in response.text
+    assert 'based on 1 reviews' in response.text
+
+    with test_db() as session:
+        session: Session
+        for review in session.query(Review).filter(Review.film_id == 7):
+            session.delete(review)
+        session.commit()
+
+    assert 'No reviews yet' in client.get('/onlyfilms/film/7').text